@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -9,4 +10,28 @@ class ReferencesConfig(AppConfig):
     verbose_name = _("django CMS References")
 
     def ready(self):
+        from .compat import VERSIONING_INSTALLED
+        from .handlers import (
+            invalidate_page_cache_handler,
+            update_extracted_references_handler,
+            update_watermark_handler,
+        )
         from .monkeypatch import admin  # NOQA
+
+        post_save.connect(
+            update_watermark_handler, dispatch_uid="djangocms_references_post_save"
+        )
+        post_delete.connect(
+            update_watermark_handler, dispatch_uid="djangocms_references_post_delete"
+        )
+        post_save.connect(
+            update_extracted_references_handler,
+            dispatch_uid="djangocms_references_extract_references",
+        )
+        if VERSIONING_INSTALLED:
+            from djangocms_versioning.signals import post_version_operation
+
+            post_version_operation.connect(
+                invalidate_page_cache_handler,
+                dispatch_uid="djangocms_references_invalidate_page_cache",
+            )
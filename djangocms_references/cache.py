@@ -0,0 +1,155 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import iri_to_uri
+
+from cms.models import PageContent, PageUrl
+from cms.utils.conf import get_cms_setting
+from cms.utils.helpers import get_timezone_name
+from cms.utils.i18n import force_language
+
+from .helpers import get_all_reference_objects, get_versionable_for_content
+
+
+def is_page_cache_invalidation_enabled():
+    return getattr(settings, "DJANGOCMS_REFERENCES_INVALIDATE_PAGE_CACHE", False)
+
+
+def is_transitive_invalidation_enabled():
+    return getattr(
+        settings, "DJANGOCMS_REFERENCES_INVALIDATE_PAGE_CACHE_TRANSITIVE", False
+    )
+
+
+def _get_referencing_stubs(queryset):
+    """Yields objects of queryset holding only their pk (and grouper id
+    of versioned content), which is all reference lookups need.
+    """
+    model = queryset.model
+    fields = ["pk"]
+    versionable = get_versionable_for_content(model)
+    if versionable:
+        fields.append(versionable.grouper_field.attname)
+    for values in queryset.prefetch_related(None).values_list(*fields):
+        obj = model(**dict(zip(fields, values)))
+        obj._state.db = queryset.db
+        yield obj
+
+
+def get_referencing_pages(content, transitive=False, using=None):
+    """Returns a set of (page id, language) pairs of page contents
+    referencing the content object.
+
+    When transitive is True, references of other referencing objects
+    (e.g. an alias used in another alias) are followed as well,
+    each object being visited once.
+
+    :param content: Content object
+    :param transitive: Follow references of referencing objects
+    :param using: Database alias
+    """
+    pages = set()
+    visited = {(content.__class__, content.pk)}
+    pending = [content]
+    while pending:
+        obj = pending.pop()
+        for queryset in get_all_reference_objects(obj, using=using):
+            if issubclass(queryset.model, PageContent):
+                pages.update(
+                    queryset.prefetch_related(None).values_list("page_id", "language")
+                )
+            elif transitive:
+                for referencing_obj in _get_referencing_stubs(queryset):
+                    key = (referencing_obj.__class__, referencing_obj.pk)
+                    if key not in visited:
+                        visited.add(key)
+                        pending.append(referencing_obj)
+    return pages
+
+
+def get_page_cache_timezones():
+    return getattr(settings, "DJANGOCMS_REFERENCES_PAGE_CACHE_TIMEZONES", None)
+
+
+def _get_timezone_names():
+    """Returns names of time zones as included in page cache keys."""
+    timezones = get_page_cache_timezones()
+    if not timezones:
+        return [get_timezone_name()]
+    names = []
+    for tz in timezones:
+        with timezone.override(tz):
+            names.append(get_timezone_name())
+    return names
+
+
+def get_page_cache_key(site_id, path, timezone_name=None):
+    """Returns the key django CMS stores the page rendered for path
+    on site_id in, see ``cms.cache.page``.
+    """
+    key = "{}:{}:{}".format(
+        get_cms_setting("CACHE_PREFIX"),
+        site_id,
+        hashlib.sha1(iri_to_uri(path).encode("utf-8")).hexdigest(),
+    )
+    if settings.USE_TZ:
+        key += ".{}".format(timezone_name)
+    return key
+
+
+def get_page_cache_keys(pages, using=None):
+    """Returns the CMS page cache keys of urls of provided pages.
+
+    Urls of all pages are fetched by a single query. Keys are built for
+    the site of each page, and each time zone listed in
+    ``DJANGOCMS_REFERENCES_PAGE_CACHE_TIMEZONES`` (the current one
+    by default).
+
+    :param pages: Iterable of (page id, language) pairs
+    :param using: Database alias
+    """
+    pages = set(pages)
+    if not pages:
+        return []
+    urls = PageUrl.objects.using(using).filter(
+        page_id__in={page_id for page_id, language in pages}
+    ).values_list(
+        "page_id", "language", "path", "slug", "page__is_home", "page__node__site_id"
+    )
+    timezone_names = _get_timezone_names()
+    keys = set()
+    for page_id, language, path, slug, is_home, site_id in urls:
+        if (page_id, language) not in pages:
+            continue
+        with force_language(language):
+            if is_home:
+                url = reverse("pages-root")
+            elif path or slug:
+                url = reverse("pages-details-by-slug", kwargs={"slug": path or slug})
+            else:
+                continue
+        for timezone_name in timezone_names:
+            keys.add(get_page_cache_key(site_id, url, timezone_name))
+    return sorted(keys)
+
+
+def invalidate_page_cache(content, transitive=False, using=None):
+    """Removes cached pages referencing the content object from the CMS
+    page cache, using a single ``delete_many`` call.
+
+    :param content: Content object
+    :param transitive: Follow references of referencing objects
+    :param using: Database alias
+    :returns: List of removed cache keys
+    """
+    from cms.cache import _get_cache_version
+
+    keys = get_page_cache_keys(
+        get_referencing_pages(content, transitive=transitive, using=using), using
+    )
+    if keys:
+        cache.delete_many(keys, version=_get_cache_version())
+    return keys
@@ -2,21 +2,32 @@ from collections import defaultdict
 from collections.abc import Iterable
 
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch
 from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from cms.app_base import CMSAppConfig, CMSAppExtension
+from cms.models import PageContent
 from cms.plugin_base import CMSPlugin
 
-from djangocms_alias.models import AliasPlugin
-from djangocms_snippet.models import SnippetPtr as SnippetPlugin
+from djangocms_alias.models import AliasContent, AliasPlugin
+from djangocms_snippet.models import Snippet, SnippetPtr as SnippetPlugin
 
-from .datastructures import ExtraColumn
+from .compat import StaticPlaceholder
+from .datastructures import ExtraColumn, GenericRelationLookup
 from .helpers import (
     get_all_reference_objects,
+    get_all_reference_objects_for_many,
     get_extra_columns,
+    get_reference_database,
+    get_references_for_display,
+    get_summary_if_above_threshold,
     get_versionable_for_content,
+    version_annotation,
     version_attr,
 )
 
@@ -26,8 +37,13 @@ class ReferencesCMSExtension(CMSAppExtension):
         self.reference_models = self._make_default()
         self.reference_plugins = self._make_default()
         self.reference_complex_relationships = self._make_default()
+        self.reference_generic_models = defaultdict(set)
+        self.reference_generic_plugins = defaultdict(set)
         self.list_extra_columns = []
         self.list_queryset_modifiers = []
+        self.list_title_fields = {}
+        self.site_fields = {}
+        self.reference_extractors = defaultdict(list)
 
     def _make_default(self):
         return defaultdict(lambda: defaultdict(set))
@@ -58,6 +74,10 @@ class ReferencesCMSExtension(CMSAppExtension):
         (AliasPlugin, 'alias') enables tracking Alias use in plugins,
         so that pages using the alias will be shown in the references
         list.
+
+        Generic foreign keys can be registered as well, in which case
+        the model can reference objects of any model:
+        (Comment, 'content_object')
         """
         # generate reference_models and reference_plugins dict object
         for definition in definitions:
@@ -72,6 +92,9 @@ class ReferencesCMSExtension(CMSAppExtension):
                 related_model = self.get_nested_relationship(model, fields)
             else:
                 field = model._meta.get_field(field_name)
+                if isinstance(field, GenericForeignKey):
+                    self.register_generic_field(model, field)
+                    continue
                 related_model = field.related_model
             if (
                 issubclass(model, (CMSPlugin,))
@@ -81,20 +104,39 @@ class ReferencesCMSExtension(CMSAppExtension):
                 store = self.reference_models
             store[related_model][model].add(field_name)
 
+    def register_generic_field(self, model, field):
+        """Registers a generic foreign key, which is looked up using
+        its content type and object id fields.
+
+        :param model: Model the generic foreign key belongs to
+        :param field: GenericForeignKey
+        """
+        if issubclass(model, CMSPlugin):
+            store = self.reference_generic_plugins
+        else:
+            store = self.reference_generic_models
+        store[model].add(GenericRelationLookup(field.ct_field, field.fk_field))
+
     def configure_list_extra_columns(self, extra_columns):
         """Registers additional columns to be displayed in the reference
         table.
 
         Expects `reference_list_extra_columns` attribute to be set,
-        which is a list of (func, label) tuple.
+        which is a list of (func, label) or (func, label, annotation) tuples.
 
         Function should expect a single argument, a content object.
         Its return value will be displayed in that column's/object's cell.
 
+        Optional annotation is a function that takes a content model and
+        the alias of the database queried, and returns an expression
+        (or None) providing the same value. It is used to populate compact
+        rows without loading model instances.
+
         Example:
         reference_list_extra_columns = [
             (lambda obj: str(obj), 'Column header'),
             (lambda obj: id(obj), 'Another column header'),
+            (lambda obj: obj.pk, 'Pk', lambda model, using: F('pk')),
         ]
         """
         for column in extra_columns:
@@ -107,6 +149,67 @@ class ReferencesCMSExtension(CMSAppExtension):
         """
         self.list_queryset_modifiers.extend(modifiers)
 
+    def configure_list_title_fields(self, title_fields):
+        """Registers fields holding titles of referencing objects,
+        used to populate compact rows.
+
+        Expects a list of (model, field_name) tuples.
+        """
+        for definition in title_fields:
+            try:
+                model, field_name = definition
+            except (ValueError, TypeError) as e:
+                raise ImproperlyConfigured(
+                    "Elements of the reference_list_title_fields list should be (model, field_name) tuples"
+                ) from e
+            self.list_title_fields[model] = field_name
+
+    def configure_site_fields(self, site_fields):
+        """Registers lookups to the site objects of a model belong to,
+        used to limit references to a single site.
+
+        Expects a list of (model, lookup) tuples.
+
+        Example:
+        reference_site_fields = [
+            (PageContent, "page__node__site"),
+        ]
+        """
+        for definition in site_fields:
+            try:
+                model, lookup = definition
+            except (ValueError, TypeError) as e:
+                raise ImproperlyConfigured(
+                    "Elements of the reference_site_fields list should be (model, lookup) tuples"
+                ) from e
+            self.site_fields[model] = lookup
+
+    def configure_reference_extractors(self, extractors):
+        """Registers functions extracting references from plugins' content
+        (e.g. links in text plugin bodies). Extracted references are
+        recorded when a plugin is saved.
+
+        Expects a list of (plugin_model, func) tuples, where func takes
+        a plugin instance and returns an iterable of referenced objects.
+
+        Example:
+        reference_extractors = [
+            (TextPlugin, extract_aliases_from_text),
+        ]
+        """
+        for definition in extractors:
+            try:
+                model, extractor = definition
+            except (ValueError, TypeError) as e:
+                raise ImproperlyConfigured(
+                    "Elements of the reference_extractors list should be (model, func) tuples"
+                ) from e
+            if not issubclass(model, CMSPlugin):
+                raise ImproperlyConfigured(
+                    "References can only be extracted from plugin models"
+                )
+            self.reference_extractors[model].append(extractor)
+
     def configure_app(self, cms_config):
         """
         Third party app can define set object as reference_fields (like Child.parent)
@@ -129,23 +232,77 @@ class ReferencesCMSExtension(CMSAppExtension):
         self.configure_list_queryset_modifiers(
             getattr(cms_config, "reference_list_queryset_modifiers", [])
         )
+        self.configure_list_title_fields(
+            getattr(cms_config, "reference_list_title_fields", [])
+        )
+        self.configure_site_fields(getattr(cms_config, "reference_site_fields", []))
+        self.configure_reference_extractors(
+            getattr(cms_config, "reference_extractors", [])
+        )
 
 
 def version_queryset_modifier(queryset):
     """Applies prefetch_related on version relation
     if provided queryset's model is versionable.
+
+    Each content object has a single version, which is fetched
+    together with its author in one query.
     """
     if get_versionable_for_content(queryset.model):
-        queryset = queryset.prefetch_related("versions", "versions__created_by")
+        from djangocms_versioning.models import Version
+
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                "versions",
+                queryset=Version.objects.select_related("created_by"),
+            )
+        )
     return queryset
 
 
 def unpublish_dependencies(request, version, *args, **kwargs):
     """Render a partial template with a list of unpublish dependencies"""
-    references = get_all_reference_objects(version.content, state_selected=False)
+    references = get_all_reference_objects(
+        version.content, state_selected=False, using=get_reference_database(request)
+    )
+    summary = get_summary_if_above_threshold(references)
+    if summary is not None:
+        base_url = reverse(
+            "djangocms_references:references-index",
+            kwargs={
+                "content_type_id": ContentType.objects.get_for_model(version.content).pk,
+                "object_id": version.content.pk,
+            },
+        )
+        return render_to_string(
+            "djangocms_references/references_summary.html",
+            {"summary": summary, "base_url": base_url},
+        )
+    extra_columns = get_extra_columns()
+    return render_to_string(
+        "djangocms_references/references_table.html",
+        {
+            "querysets": get_references_for_display(references, extra_columns),
+            "extra_columns": extra_columns,
+        },
+    )
+
+
+def bulk_unpublish_dependencies(request, versions, *args, **kwargs):
+    """Render a partial template with a single, deduplicated list of
+    unpublish dependencies of all provided versions"""
+    references = get_all_reference_objects_for_many(
+        [version.content for version in versions],
+        state_selected=False,
+        using=get_reference_database(request),
+    )
+    extra_columns = get_extra_columns()
     return render_to_string(
         "djangocms_references/references_table.html",
-        {"querysets": references, "extra_columns": get_extra_columns()},
+        {
+            "querysets": get_references_for_display(references, extra_columns),
+            "extra_columns": extra_columns,
+        },
     )
 
 
@@ -156,11 +313,35 @@ class ReferencesCMSAppConfig(CMSAppConfig):
     )
     reference_fields = [(AliasPlugin, "alias"), (SnippetPlugin, "snippet_grouper")]
     reference_list_extra_columns = [
-        (version_attr(lambda v: v.get_state_display()), _("Status")),
-        (version_attr(lambda v: v.created_by), _("Author")),
-        (version_attr(lambda v: v.modified), _("Modified date")),
+        (
+            version_attr(lambda v: v.get_state_display()),
+            _("Status"),
+            version_annotation("state"),
+        ),
+        (
+            version_attr(lambda v: v.created_by),
+            _("Author"),
+            version_annotation("created_by"),
+        ),
+        (
+            version_attr(lambda v: v.modified),
+            _("Modified date"),
+            version_annotation("modified"),
+        ),
     ]
     reference_list_queryset_modifiers = [version_queryset_modifier]
+    reference_list_title_fields = [
+        (PageContent, "title"),
+        (AliasContent, "name"),
+        (Snippet, "name"),
+    ]
+    reference_site_fields = [
+        (PageContent, "page__node__site"),
+        (AliasContent, "alias__site"),
+    ]
+    if StaticPlaceholder is not None:
+        reference_list_title_fields.append((StaticPlaceholder, "name"))
+        reference_site_fields.append((StaticPlaceholder, "site"))
     versioning_add_to_confirmation_context = {
         "unpublish": {"unpublish_dependencies": unpublish_dependencies}
     }
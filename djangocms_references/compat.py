@@ -8,3 +8,9 @@ def is_versioning_installed():
 
 
 VERSIONING_INSTALLED = is_versioning_installed()
+
+
+try:
+    from cms.models import StaticPlaceholder
+except ImportError:  # django CMS versions without static placeholders
+    StaticPlaceholder = None
@@ -0,0 +1,15 @@
+from django.utils.translation import gettext_lazy as _
+
+
+# Sort keys accepted by the references view, see helpers.get_sorted_references
+SORT_OPTIONS = (
+    ("title", _("Title")),
+    ("content_type", _("Content type")),
+    ("state", _("Status")),
+    ("author", _("Author")),
+    ("modified", _("Modified date")),
+)
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_SUMMARY_THRESHOLD = 1000
+DEFAULT_STREAMING_CHUNK_SIZE = 100
+WATERMARK_CACHE_KEY = "djangocms_references_watermark"
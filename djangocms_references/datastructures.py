@@ -1,4 +1,64 @@
 from collections import namedtuple
 
 
-ExtraColumn = namedtuple("ExtraColumn", ("getter", "verbose_name"))
+ExtraColumn = namedtuple(
+    "ExtraColumn", ("getter", "verbose_name", "annotation"), defaults=(None,)
+)
+GenericRelationLookup = namedtuple("GenericRelationLookup", ("ct_field", "fk_field"))
+IndexRequirement = namedtuple("IndexRequirement", ("model", "fields"))
+ThroughTableLookup = namedtuple(
+    "ThroughTableLookup", ("through", "source_field", "target_field")
+)
+ReferenceEdge = namedtuple(
+    "ReferenceEdge",
+    ("source_type", "source_id", "target_type", "target_id", "relation"),
+)
+ReferenceOccurrence = namedtuple(
+    "ReferenceOccurrence", ("slot", "plugin_id", "position", "language")
+)
+ReferenceSummary = namedtuple(
+    "ReferenceSummary", ("total", "content_types", "languages", "states")
+)
+
+
+class ReferenceRow:
+    """Slim representation of a single row of the references table,
+    used in place of model instances when compact rows are enabled.
+
+    Values of extra columns are stored in the same order as ``columns``,
+    which is shared by all rows built from the same list of extra columns.
+    """
+
+    __slots__ = (
+        "model",
+        "pk",
+        "title",
+        "language",
+        "preview_url",
+        "values",
+        "columns",
+        "reference_occurrences",
+    )
+
+    def __init__(
+        self, model, pk, title, language=None, preview_url=None, values=(), columns=()
+    ):
+        self.model = model
+        self.pk = pk
+        self.title = title
+        self.language = language
+        self.preview_url = preview_url
+        self.values = values
+        self.columns = columns
+        self.reference_occurrences = ()
+
+    def __str__(self):
+        return str(self.title)
+
+    def __repr__(self):
+        return "<ReferenceRow {model} ({pk})>".format(
+            model=self.model._meta.label, pk=self.pk
+        )
+
+    def get_column_value(self, column):
+        return self.values[self.columns.index(column)]
@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+from cms.models import CMSPlugin, Placeholder
+
+from .compat import VERSIONING_INSTALLED
+from .helpers import (
+    get_extension,
+    get_versionable_for_grouper,
+    is_watermark_enabled,
+    update_extracted_references,
+    update_watermark,
+)
+
+
+@lru_cache(maxsize=1)
+def get_watched_models():
+    """Returns a set of models whose changes can affect references:
+    registered referencing and referenced models (including contents
+    of versioned referenced models), placeholders and versions.
+    Plugin models are watched separately.
+    """
+    extension = get_extension()
+    models = {Placeholder}
+    if VERSIONING_INSTALLED:
+        from djangocms_versioning.models import Version
+
+        models.add(Version)
+    for store in (extension.reference_models, extension.reference_plugins):
+        for target_model, reference_models in store.items():
+            models.add(target_model)
+            models.update(reference_models)
+            versionable = get_versionable_for_grouper(target_model)
+            if versionable:
+                models.add(versionable.content_model)
+    models.update(extension.reference_generic_models)
+    return models
+
+
+def is_watched_model(model):
+    return issubclass(model, CMSPlugin) or model in get_watched_models()
+
+
+def update_watermark_handler(sender, instance=None, **kwargs):
+    """Updates the watermark used for conditional responses
+    of the references views when a watched model changes.
+
+    Placeholders without a source object (e.g. clipboards, created
+    while rendering the toolbar) don't affect references and are ignored.
+    """
+    if not is_watermark_enabled() or not is_watched_model(sender):
+        return
+    if issubclass(sender, Placeholder) and instance.content_type_id is None:
+        return
+    update_watermark()
+
+
+def update_extracted_references_handler(sender, instance, raw=False, **kwargs):
+    """Records references found by extractors registered for
+    the saved plugin's model.
+    """
+    if raw or not issubclass(sender, CMSPlugin):
+        return
+    if sender not in get_extension().reference_extractors:
+        return
+    update_extracted_references(instance)
+
+
+def invalidate_page_cache_handler(sender, operation, obj, **kwargs):
+    """Removes cached pages referencing content of a version
+    that has been published or unpublished.
+    """
+    from djangocms_versioning.constants import (
+        OPERATION_PUBLISH,
+        OPERATION_UNPUBLISH,
+    )
+
+    from .cache import (
+        invalidate_page_cache,
+        is_page_cache_invalidation_enabled,
+        is_transitive_invalidation_enabled,
+    )
+
+    if operation not in (OPERATION_PUBLISH, OPERATION_UNPUBLISH):
+        return
+    if not is_page_cache_invalidation_enabled():
+        return
+    invalidate_page_cache(
+        obj.content, transitive=is_transitive_invalidation_enabled()
+    )
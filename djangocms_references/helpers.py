@@ -1,46 +1,94 @@
-from collections import defaultdict
+import uuid
+from collections import Counter, defaultdict
 from functools import lru_cache
 from itertools import groupby
 from operator import itemgetter
 
 from django.apps import apps
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import F, Q
-
-from cms.models import CMSPlugin
-
-
-def _get_latest_version_for_grouping_values(versionable, content):
-    """Finds the latest version for a content object using the
-    grouper and grouper filtering values.
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DateTimeField,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+    prefetch_related_objects,
+)
+
+from cms.models import CMSPlugin, Placeholder
+from cms.toolbar.utils import get_object_preview_url
+
+from .compat import VERSIONING_INSTALLED, StaticPlaceholder
+from .constants import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_STREAMING_CHUNK_SIZE,
+    DEFAULT_SUMMARY_THRESHOLD,
+    SORT_OPTIONS,
+    WATERMARK_CACHE_KEY,
+)
+from .datastructures import (
+    GenericRelationLookup,
+    ReferenceEdge,
+    ReferenceOccurrence,
+    ReferenceRow,
+    ReferenceSummary,
+    ThroughTableLookup,
+)
+from .middleware import has_recent_write
+from .models import ExtractedReference
+
+
+def get_latest_content_condition(versionable):
+    """Returns an expression matching content objects that are the most
+    recent content objects of their grouper and grouping values.
 
     :param versionable: VersionableItem
-    :param content: A content object
-    :returns: A Version object, or None
     """
-    grouper_contents = versionable.for_content_grouping_values(content)
-    return grouper_contents.last().versions.first()
+    fields = dict.fromkeys(
+        (versionable.grouper_field_name,) + tuple(versionable.grouping_fields)
+    )
+    newer_contents = versionable.content_model._base_manager.filter(
+        pk__gt=OuterRef("pk"), **{field: OuterRef(field) for field in fields}
+    )
+    return ~Exists(newer_contents)
 
 
 def _get_latest_versions_by_grouping_values(versionable, queryset):
-    """Find all of a groupers versions, filter the supplied queryset
-    to ensure that only the latest version is supplied.
+    """Filter the supplied queryset to ensure that only the latest
+    version of each grouper and grouping values is supplied.
 
     :param versionable: VersionableItem
     :param queryset: A queryset
     :returns: A queryset
     """
-    exclusion_list = []
-    for content in queryset:
-        current_version = content.versions.first()
-        latest_version = _get_latest_version_for_grouping_values(versionable, content)
+    return queryset.filter(get_latest_content_condition(versionable))
 
-        if latest_version != current_version:
-            exclusion_list.append(content.pk)
 
-    if exclusion_list:
-        return queryset.exclude(id__in=exclusion_list)
-    return queryset
+def get_reference_database(request=None):
+    """Returns the database alias reference queries should run against.
+
+    Uses ``DJANGOCMS_REFERENCES_DATABASE`` setting, falling back to the
+    default database when the session of the provided request has written
+    recently (see ``ReadAfterWriteMiddleware``). Returns None when the
+    setting is not defined, leaving the decision to database routers.
+
+    :param request: Optional request object
+    """
+    using = getattr(settings, "DJANGOCMS_REFERENCES_DATABASE", None)
+    if using and request is not None and has_recent_write(request):
+        return DEFAULT_DB_ALIAS
+    return using
 
 
 def get_versionable_for_content(content):
@@ -58,6 +106,22 @@ def get_versionable_for_content(content):
         pass
 
 
+def get_versionable_for_grouper(grouper):
+    """Returns a VersionableItem for a given grouper object (or grouper model).
+
+    Returns None if given object is not a grouper of versioned content,
+    or versioning is not installed.
+    """
+    try:
+        from djangocms_versioning import versionables
+    except ImportError:
+        return
+    try:
+        return versionables.for_grouper(grouper)
+    except KeyError:
+        pass
+
+
 def get_lookup(field_name, versionable):
     """Returns a filtering lookup.
 
@@ -73,6 +137,29 @@ def get_lookup(field_name, versionable):
     return field_name
 
 
+def get_through_table_lookup(model, field_name):
+    """Returns a ThroughTableLookup if field_name is a many to many field
+    of model, otherwise None.
+
+    :param model: Model the field belongs to
+    :param field_name: Field name, lookups spanning relations are not
+                       considered
+    """
+    if "__" in field_name:
+        return
+    try:
+        field = model._meta.get_field(field_name)
+    except FieldDoesNotExist:
+        return
+    if not field.many_to_many or not field.concrete:
+        return
+    return ThroughTableLookup(
+        through=field.remote_field.through,
+        source_field=field.m2m_field_name(),
+        target_field=field.m2m_reverse_field_name(),
+    )
+
+
 @lru_cache(maxsize=1)
 def get_extension():
     app = apps.get_app_config("djangocms_references")
@@ -83,7 +170,86 @@ def get_extra_columns():
     return get_extension().list_extra_columns
 
 
-def _get_reference_models(content_model, models):
+def get_site_filter(model, site, prefix=""):
+    """Returns a Q object matching objects of model that belong to
+    the provided site or to no site, or None if no site field has been
+    registered for model.
+
+    :param model: A model
+    :param site: A Site object
+    :param prefix: Optional lookup prefix
+    """
+    lookup = get_extension().site_fields.get(model)
+    if lookup is None:
+        return
+    lookup = prefix + lookup
+    return Q(**{lookup: site}) | Q(**{lookup + "__isnull": True})
+
+
+def get_source_site_filter(site, using=None):
+    """Returns a Q object matching plugins in placeholders whose source
+    objects belong to the provided site (or to no site).
+
+    Sources are matched in a subquery per model with a registered site
+    field, placeholders of other models are not filtered.
+
+    :param site: A Site object
+    :param using: Database alias
+    """
+    filters = Q()
+    content_types = []
+    for model in get_extension().site_fields:
+        content_type = ContentType.objects.db_manager(using).get_for_model(model)
+        content_types.append(content_type.pk)
+        sources = model._base_manager.using(using).filter(
+            get_site_filter(model, site)
+        )
+        filters |= Q(
+            placeholder__content_type=content_type,
+            placeholder__object_id__in=sources.values("pk"),
+        )
+    return filters | ~Q(placeholder__content_type__in=content_types)
+
+
+def get_title_field(model):
+    """Returns the name of the field holding a title of model's objects,
+    or None if no title field has been registered for model.
+    """
+    return get_extension().list_title_fields.get(model)
+
+
+def get_display_title(model, title, language=None):
+    """Returns the title of a compact row as shown in the references table.
+
+    Titles read from a registered title field are followed by the
+    object's language, matching ``str()`` of language aware contents
+    (e.g. "Home (en)"). Other titles are already the result of ``str()``.
+    Model objects are displayed using ``str()`` instead.
+
+    :param model: Model of the object
+    :param title: Title field value or ``str()`` of the object
+    :param language: Optional language of the object
+    """
+    if get_title_field(model) is None or not language:
+        return str(title)
+    return "{} ({})".format(title, language)
+
+
+def get_object_title(obj):
+    """Returns the value of the registered title field of obj,
+    falling back to ``str(obj)``.
+    """
+    title_field = get_title_field(obj.__class__)
+    if title_field is None:
+        return str(obj)
+    return getattr(obj, title_field)
+
+
+def is_compact_rows_enabled():
+    return getattr(settings, "DJANGOCMS_REFERENCES_COMPACT_ROWS", False)
+
+
+def _get_reference_models(content_model, models, generic_models=None):
     """Yields (model, lookups) pairs, where model is a model that
     can contain references to content_model and lookups is a list
     of lookups used to filter that model's objects against
@@ -91,6 +257,8 @@ def _get_reference_models(content_model, models):
 
     :param content_model: A content model
     :param models: Related model registry
+    :param generic_models: Optional registry of models referencing
+                           any model through generic foreign keys
 
     Example:
     models = {
@@ -110,11 +278,15 @@ def _get_reference_models(content_model, models):
         target_model = versionable.grouper_model
     else:
         target_model = content_model
-    for model, fields in models[target_model].items():
-        lookups = []
+    model_lookups = defaultdict(list)
+    for model, fields in models.get(target_model, {}).items():
         for field in fields:
-            lookups.append(get_lookup(field, versionable))
-        yield model, lookups
+            model_lookups[model].append(
+                get_through_table_lookup(model, field) or get_lookup(field, versionable)
+            )
+    for model, generic_lookups in (generic_models or {}).items():
+        model_lookups[model].extend(generic_lookups)
+    yield from model_lookups.items()
 
 
 def get_reference_models(content_model):
@@ -122,7 +294,9 @@ def get_reference_models(content_model):
     is a model that can contain references to content_model.
     """
     extension = get_extension()
-    yield from _get_reference_models(content_model, extension.reference_models)
+    yield from _get_reference_models(
+        content_model, extension.reference_models, extension.reference_generic_models
+    )
 
 
 def get_reference_plugins(content_model):
@@ -130,13 +304,16 @@ def get_reference_plugins(content_model):
     is a plugin model that can contain references to content_model.
     """
     extension = get_extension()
-    yield from _get_reference_models(content_model, extension.reference_plugins)
+    yield from _get_reference_models(
+        content_model, extension.reference_plugins, extension.reference_generic_plugins
+    )
 
 
 def get_filters(content, lookups):
     """
     :param content: Content object to create filters against
-    :param lookups: A list of lookup strings
+    :param lookups: A list of lookup strings, GenericRelationLookups
+                    or ThroughTableLookups
 
     Example:
     poll = Poll.objects.get()
@@ -145,11 +322,59 @@ def get_filters(content, lookups):
     """
     q = Q()
     for lookup in lookups:
-        q |= Q(**{lookup: content})
+        if isinstance(lookup, GenericRelationLookup):
+            q |= get_generic_filters(content, lookup)
+        elif isinstance(lookup, ThroughTableLookup):
+            q |= get_through_table_filters(content, lookup)
+        else:
+            q |= Q(**{lookup: content})
+    return q
+
+
+def get_generic_filters(content, lookup):
+    """Returns a Q object matching generic foreign keys pointing
+    to the content object, or to its grouper if content is versioned.
+
+    :param content: Content object
+    :param lookup: GenericRelationLookup
+
+    Example:
+    get_filters(poll, [GenericRelationLookup('content_type', 'object_id')]) ->
+    Q(content_type=<ContentType: poll>, object_id=poll.pk)
+    """
+    objects = [content]
+    versionable = get_versionable_for_content(content)
+    if versionable:
+        objects.append(getattr(content, versionable.grouper_field_name))
+    q = Q()
+    for obj in objects:
+        content_type = ContentType.objects.db_manager(obj._state.db).get_for_model(obj)
+        q |= Q(**{lookup.ct_field: content_type, lookup.fk_field: obj.pk})
     return q
 
 
-def _get_reference_objects(content, models_func):
+def get_through_table_filters(content, lookup):
+    """Returns a Q object matching objects related to the content object
+    (or to its grouper if content is versioned) through a many to many
+    field, using a subquery on the through table instead of joins.
+
+    :param content: Content object
+    :param lookup: ThroughTableLookup
+    """
+    versionable = get_versionable_for_content(content)
+    if versionable:
+        target_id = getattr(content, versionable.grouper_field.attname)
+    else:
+        target_id = content.pk
+    source_ids = lookup.through._base_manager.filter(
+        **{lookup.target_field: target_id}
+    ).values(lookup.source_field)
+    return Q(pk__in=source_ids)
+
+
+def _get_reference_objects(
+    content, models_func, using=None, only_model=None, language=None, site=None
+):
     """Generic generator that yields querysets of models that are
     related to content object.
 
@@ -157,19 +382,36 @@ def _get_reference_objects(content, models_func):
     :param models_func: A function that takes a content model and returns
                         a list of (model, lookups) tuples returned by
                         _get_reference_models
+    :param using: Database alias
+    :param only_model: Optional model, other models are skipped
+    :param language: Optional language, objects of models with a language
+                     field (including all plugins) are filtered by it
+    :param site: Optional Site, objects of models with a registered site
+                 field are filtered by it
     """
     for reference in models_func(content.__class__):
         model, lookups = reference
+        if only_model is not None and model is not only_model:
+            continue
         filters = get_filters(content, lookups)
-        qs = model.objects.filter(filters)
+        if language and _has_language_field(model):
+            filters &= Q(language=language)
+        site_filter = get_site_filter(model, site) if site else None
+        if site_filter is not None:
+            filters &= site_filter
+        qs = model.objects.using(using).filter(filters)
         if qs.exists():
             yield qs
 
 
-def get_reference_objects(content):
+def get_reference_objects(content, using=None, model=None, language=None, site=None):
     """Yields querysets of models that are related to provided content object.
 
     :param content: Content object
+    :param using: Database alias
+    :param model: Optional model to limit the lookup to
+    :param language: Optional language of objects to look up
+    :param site: Optional Site objects to look up belong to
 
     Example:
     poll = Poll.objects.get()
@@ -178,10 +420,17 @@ def get_reference_objects(content):
     list(get_reference_objects(poll)) ->
     [Answer.objects.filter(pk__in=[1, 2])]
     """
-    yield from _get_reference_objects(content, get_reference_models)
+    yield from _get_reference_objects(
+        content,
+        get_reference_models,
+        using,
+        only_model=model,
+        language=language,
+        site=site,
+    )
 
 
-def contenttype_values_queryset(queryset):
+def contenttype_values_queryset(queryset, occurrences=False):
     """Convert a plugin queryset to a ValuesQuerySet with just
     placeholder.content_type and placeholder.object_id data.
 
@@ -189,54 +438,199 @@ def contenttype_values_queryset(queryset):
     placeholders containing these plugins) from the database.
 
     :param queryset: Plugin queryset
+    :param occurrences: Also include placeholder slot, plugin id,
+                        position and language of each plugin
     """
-    return (
+    queryset = (
         queryset.order_by()  # need to clear ordering,
         # as ordering clauses are not allowed in subqueries
         .annotate(
             content_type=F("placeholder__content_type"),
             object_id=F("placeholder__object_id"),
-        ).values("content_type", "object_id")
+        )
     )
+    if occurrences:
+        return queryset.annotate(slot=F("placeholder__slot"), plugin_id=F("pk")).values(
+            "content_type", "object_id", "slot", "plugin_id", "position", "language"
+        )
+    return queryset.values("content_type", "object_id")
 
 
-def convert_plugin_querysets_to_sources(querysets):
+def convert_plugin_querysets_to_sources(querysets, using=None, occurrences=False):
     """Convert provided plugin querysets to ValuesQuerySets containing
     only source object information and concatenate them into one
     CMSPlugin queryset using UNION.
 
     :param querysets: List of plugin querysets
+    :param using: Database alias
+    :param occurrences: Keep a row for every plugin (using UNION ALL),
+                        including its slot, id, position and language
     """
     # since plugins use concrete inheritance, it's safe to combine querysets
     # with PKs of different plugin models
-    sources = contenttype_values_queryset(CMSPlugin.objects.none())
+    sources = contenttype_values_queryset(
+        CMSPlugin.objects.using(using).none(), occurrences
+    )
     for queryset in querysets:
-        sources = sources.union(contenttype_values_queryset(queryset))
+        sources = sources.union(
+            contenttype_values_queryset(queryset, occurrences), all=occurrences
+        )
+    if occurrences:
+        return sources.order_by("content_type", "object_id", "slot", "position")
     return sources.order_by("content_type")
 
 
-def get_reference_objects_from_plugins(content):
+def get_reference_objects_from_plugins(
+    content, using=None, model=None, language=None, site=None, occurrences=None
+):
     """Yields querysets of models that are related to provided
     content object through plugins.
 
     :param content: Content object
+    :param using: Database alias
+    :param model: Optional source model to limit the lookup to
+    :param language: Optional language, only plugins of this language
+                     are considered
+    :param site: Optional Site, only plugins of sources belonging to this
+                 site are considered
+    :param occurrences: Optional dict, populated with lists of
+                        ReferenceOccurrences keyed by (content type id,
+                        object id) of source objects. Occurrences are
+                        fetched by the same query as the sources.
     """
-    querysets = [
-        qs.filter(
-            # NOTE: This filters out static placeholders
-            Q(placeholder__content_type__isnull=False)
+    if model is None:
+        # NOTE: Static placeholders don't have a source object,
+        # they are retrieved by get_static_placeholders
+        source_filter = Q(placeholder__content_type__isnull=False)
+    else:
+        source_filter = Q(
+            placeholder__content_type=ContentType.objects.db_manager(
+                using
+            ).get_for_model(model)
         )
-        for qs in _get_reference_objects(content, get_reference_plugins)
-    ]
+    if site:
+        source_filter &= get_source_site_filter(site, using)
+    plugin_querysets = list(
+        _get_reference_objects(
+            content, get_reference_plugins, using, language=language
+        )
+    )
+    extracted_plugins = get_extracted_reference_plugins(content, using, language)
+    if extracted_plugins is not None:
+        plugin_querysets.append(extracted_plugins)
+    querysets = [qs.filter(source_filter) for qs in plugin_querysets]
     # `querysets` contains a list of plugin querysets,
     # we want to end up with a list of source object (CMSPlugin.placeholder.source)
     # querysets
-    sources = convert_plugin_querysets_to_sources(querysets)
+    sources = convert_plugin_querysets_to_sources(
+        querysets, using, occurrences=occurrences is not None
+    )
     for ctype_id, group_sources in groupby(sources, itemgetter("content_type")):
-        content_type = ContentType.objects.get_for_id(ctype_id)
+        object_ids = []
+        for source in group_sources:
+            object_ids.append(source["object_id"])
+            if occurrences is not None:
+                occurrences.setdefault((ctype_id, source["object_id"]), []).append(
+                    ReferenceOccurrence(
+                        source["slot"],
+                        source["plugin_id"],
+                        source["position"],
+                        source["language"],
+                    )
+                )
+        # Objects are retrieved from the database the content type was loaded from
+        content_type = ContentType.objects.db_manager(using).get_for_id(ctype_id)
         yield content_type.get_all_objects_for_this_type(
-            pk__in=[source["object_id"] for source in group_sources]
+            pk__in=list(dict.fromkeys(object_ids))
+        )
+    if model is None or model is StaticPlaceholder:
+        static_placeholders = get_static_placeholders(plugin_querysets, using, site)
+        if static_placeholders is not None and static_placeholders.exists():
+            yield static_placeholders
+
+
+def get_extracted_reference_plugins(content, using=None, language=None):
+    """Returns a queryset of plugins with extracted references
+    to the content object, or None if there are no such plugins.
+
+    :param content: Content object
+    :param using: Database alias
+    :param language: Optional language of plugins
+    """
+    if not get_extension().reference_extractors:
+        return
+    extracted = ExtractedReference.objects.using(using).filter(
+        get_generic_filters(content, GenericRelationLookup("content_type", "object_id"))
+    )
+    queryset = CMSPlugin.objects.using(using).filter(pk__in=extracted.values("plugin"))
+    if language:
+        queryset = queryset.filter(language=language)
+    if queryset.exists():
+        return queryset
+
+
+def extract_references(plugin):
+    """Returns a set of (content type id, object id) pairs of objects
+    referenced in plugin's content, found by registered extractors.
+
+    :param plugin: A plugin instance
+    """
+    references = set()
+    for extractor in get_extension().reference_extractors.get(plugin.__class__, []):
+        for obj in extractor(plugin):
+            content_type = ContentType.objects.db_manager(obj._state.db).get_for_model(
+                obj
+            )
+            references.add((content_type.pk, obj.pk))
+    return references
+
+
+def update_extracted_references(plugin):
+    """Replaces recorded extracted references of the plugin with
+    references currently found in its content.
+
+    :param plugin: A plugin instance
+    """
+    using = plugin._state.db
+    ExtractedReference.objects.using(using).filter(plugin=plugin).delete()
+    ExtractedReference.objects.using(using).bulk_create(
+        [
+            ExtractedReference(
+                plugin_id=plugin.pk,
+                content_type_id=content_type_id,
+                object_id=object_id,
+            )
+            for content_type_id, object_id in extract_references(plugin)
+        ]
+    )
+
+
+def get_static_placeholders(querysets, using=None, site=None):
+    """Returns a queryset of static placeholders whose draft or public
+    placeholder contains plugins of provided querysets, retrieved in
+    a single query using subqueries.
+
+    Returns None if there are no plugin querysets or static placeholders
+    are not supported by the installed django CMS version.
+
+    :param querysets: List of plugin querysets
+    :param using: Database alias
+    :param site: Optional Site static placeholders are limited to
+    """
+    if StaticPlaceholder is None or not querysets:
+        return
+    filters = Q()
+    for queryset in querysets:
+        placeholders = (
+            queryset.filter(placeholder__content_type__isnull=True)
+            .order_by()
+            .values("placeholder")
         )
+        filters |= Q(draft__in=placeholders) | Q(public__in=placeholders)
+    site_filter = get_site_filter(StaticPlaceholder, site) if site else None
+    if site_filter is not None:
+        filters &= site_filter
+    return StaticPlaceholder.objects.using(using).filter(filters)
 
 
 def combine_querysets_of_same_models(*querysets_list):
@@ -304,7 +698,47 @@ def apply_filters(queryset, state_selected):
     return queryset
 
 
-def get_all_reference_objects(content, state_selected=False):
+def get_reference_state_counts(querysets):
+    """Returns a dict mapping version states to the number of
+    referencing objects in that state, using a single aggregate query.
+
+    Objects of models that are not versioned are not counted.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    """
+    filters = Q()
+    using = None
+    for queryset in querysets:
+        if get_versionable_for_content(queryset.model):
+            using = queryset.db
+            content_type = ContentType.objects.db_manager(using).get_for_model(
+                queryset.model
+            )
+            filters |= Q(content_type=content_type, object_id__in=queryset.values("pk"))
+    if not filters:
+        return {}
+
+    from djangocms_versioning.models import Version
+
+    counts = (
+        Version.objects.using(using)
+        .filter(filters)
+        .order_by()
+        .values("state")
+        .annotate(count=Count("pk"))
+    )
+    return {row["state"]: row["count"] for row in counts}
+
+
+def get_all_reference_objects(
+    content,
+    state_selected=False,
+    using=None,
+    model=None,
+    language=None,
+    site=None,
+    occurrences=None,
+):
     """Retrieves related objects (directly related and through plugins),
     combines the querysets of the same models
     functions (currently only filtering by version state).
@@ -314,10 +748,29 @@ def get_all_reference_objects(content, state_selected=False):
 
     :param content: Content object
     :param state_selected: Filter state selected by the user
+    :param using: Database alias, see ``get_reference_database``
+    :param model: Optional model, only references of this model are retrieved
+    :param language: Optional language, references of models with
+                     a language field are limited to this language
+    :param site: Optional Site, references of models with a registered
+                 site field are limited to this site
+    :param occurrences: Optional dict populated with plugins holding the
+                        references, see ``get_reference_objects_from_plugins``
     """
     querysets = combine_querysets_of_same_models(
-        get_reference_objects(content), get_reference_objects_from_plugins(content)
+        get_reference_objects(content, using, model, language, site),
+        get_reference_objects_from_plugins(
+            content, using, model, language, site, occurrences
+        ),
     )
+    return _filter_reference_querysets(querysets, state_selected)
+
+
+def _filter_reference_querysets(querysets, state_selected):
+    """Filters combined querysets of referencing objects by the selected
+    version state, limits them to the latest versions and applies
+    additional modifiers.
+    """
     if state_selected and state_selected != "all":
         querysets = list(apply_filters(qs, state_selected) for qs in querysets)
 
@@ -327,6 +780,335 @@ def get_all_reference_objects(content, state_selected=False):
     return list(apply_additional_modifiers(qs) for qs in querysets)
 
 
+def get_bulk_filters(contents, lookups):
+    """Like ``get_filters``, but matches objects referencing any of
+    the provided content objects using ``__in`` lookups.
+
+    :param contents: List of content objects of the same model
+    :param lookups: A list of lookup strings, GenericRelationLookups
+                    or ThroughTableLookups
+
+    Example:
+    get_bulk_filters([poll1, poll2], ['poll']) -> Q(poll__in=[poll1, poll2])
+    """
+    content_model = contents[0].__class__
+    versionable = get_versionable_for_content(content_model)
+    if versionable:
+        target_model = versionable.grouper_model
+        target_ids = [getattr(c, versionable.grouper_field.attname) for c in contents]
+    else:
+        target_model = content_model
+        target_ids = [c.pk for c in contents]
+    using = contents[0]._state.db
+    q = Q()
+    for lookup in lookups:
+        if isinstance(lookup, GenericRelationLookup):
+            for model, ids in {
+                content_model: [c.pk for c in contents],
+                target_model: target_ids,
+            }.items():
+                content_type = ContentType.objects.db_manager(using).get_for_model(
+                    model
+                )
+                q |= Q(
+                    **{lookup.ct_field: content_type, lookup.fk_field + "__in": ids}
+                )
+        elif isinstance(lookup, ThroughTableLookup):
+            source_ids = lookup.through._base_manager.filter(
+                **{lookup.target_field + "__in": target_ids}
+            ).values(lookup.source_field)
+            q |= Q(pk__in=source_ids)
+        else:
+            q |= Q(**{lookup + "__in": contents})
+    return q
+
+
+def get_all_reference_objects_for_many(contents, state_selected=False, using=None):
+    """Retrieves objects referencing any of the provided content objects,
+    directly or through plugins, like ``get_all_reference_objects``.
+
+    Lookups use ``__in`` filters, so the number of queries depends on
+    the number of registered models rather than the number of content
+    objects. Querysets are combined per model, so objects referencing
+    several of the content objects are only listed once.
+
+    :param contents: Iterable of content objects, of one or more models
+    :param state_selected: Filter state selected by the user
+    :param using: Database alias, see ``get_reference_database``
+    """
+    contents_by_model = defaultdict(list)
+    for content in contents:
+        contents_by_model[content.__class__].append(content)
+
+    querysets = []
+    plugin_querysets = []
+    extracted_filters = Q()
+    for content_model, model_contents in contents_by_model.items():
+        for model, lookups in get_reference_models(content_model):
+            # Lookups spanning to several contents of a grouper would
+            # duplicate rows when joined, so they are matched in a subquery
+            referencing = model._base_manager.using(using).filter(
+                get_bulk_filters(model_contents, lookups)
+            )
+            querysets.append(
+                model.objects.using(using).filter(pk__in=referencing.values("pk"))
+            )
+        for model, lookups in get_reference_plugins(content_model):
+            plugin_querysets.append(
+                model.objects.using(using).filter(
+                    get_bulk_filters(model_contents, lookups)
+                )
+            )
+        extracted_filters |= get_bulk_filters(
+            model_contents, [GenericRelationLookup("content_type", "object_id")]
+        )
+    if get_extension().reference_extractors and extracted_filters:
+        extracted = ExtractedReference.objects.using(using).filter(extracted_filters)
+        plugin_querysets.append(
+            CMSPlugin.objects.using(using).filter(pk__in=extracted.values("plugin"))
+        )
+
+    if plugin_querysets:
+        sources = convert_plugin_querysets_to_sources(
+            [
+                qs.filter(placeholder__content_type__isnull=False)
+                for qs in plugin_querysets
+            ],
+            using,
+        )
+        for ctype_id, group_sources in groupby(sources, itemgetter("content_type")):
+            content_type = ContentType.objects.db_manager(using).get_for_id(ctype_id)
+            querysets.append(
+                content_type.get_all_objects_for_this_type(
+                    pk__in=[source["object_id"] for source in group_sources]
+                )
+            )
+        static_placeholders = get_static_placeholders(plugin_querysets, using)
+        if static_placeholders is not None:
+            querysets.append(static_placeholders)
+
+    querysets = combine_querysets_of_same_models(querysets)
+    return _filter_reference_querysets(querysets, state_selected)
+
+
+def get_latest_source_filter(state=None, using=None):
+    """Returns a Q object matching plugins in placeholders whose source
+    objects are the latest content objects of their grouper (optionally
+    in the provided version state), using a subquery per versioned model.
+
+    Placeholders of models that are not versioned are not filtered.
+
+    :param state: Optional version state of source objects
+    :param using: Database alias
+    """
+    if not VERSIONING_INSTALLED:
+        return Q()
+    filters = Q()
+    content_types = []
+    versionables = apps.get_app_config("djangocms_versioning").cms_extension.versionables
+    for versionable in versionables:
+        content_model = versionable.content_model
+        content_type = ContentType.objects.db_manager(using).get_for_model(content_model)
+        content_types.append(content_type.pk)
+        contents = content_model._base_manager.using(using).filter(
+            get_latest_content_condition(versionable)
+        )
+        if state:
+            contents = contents.filter(versions__state=state)
+        filters |= Q(
+            placeholder__content_type=content_type,
+            placeholder__object_id__in=contents.values("pk"),
+        )
+    return filters | ~Q(placeholder__content_type__in=content_types)
+
+
+def get_plugin_source_filter(state=None, using=None):
+    """Returns a Q object matching plugins in placeholders of source
+    objects (or static placeholders) whose sources are the latest
+    content objects of their grouper, optionally in the provided state.
+
+    :param state: Optional version state of source objects
+    :param using: Database alias
+    """
+    source_filter = Q(placeholder__content_type__isnull=False)
+    if StaticPlaceholder is not None:
+        static_placeholders = StaticPlaceholder.objects.using(using)
+        source_filter |= Q(placeholder__in=static_placeholders.values("draft"))
+        source_filter |= Q(placeholder__in=static_placeholders.values("public"))
+    return source_filter & get_latest_source_filter(state, using)
+
+
+def filter_latest_referencing_objects(queryset, state=None):
+    """Limits a queryset of referencing objects of a versioned model to
+    the latest content objects, optionally in the provided state.
+    Querysets of other models are returned unchanged.
+
+    :param queryset: A queryset
+    :param state: Optional version state
+    """
+    versionable = get_versionable_for_content(queryset.model)
+    if versionable:
+        queryset = queryset.filter(get_latest_content_condition(versionable))
+        if state:
+            queryset = queryset.filter(versions__state=state)
+    return queryset
+
+
+def has_references(content, state=None, using=None):
+    """Returns True if any object references the content object, directly
+    or through plugins, in a single query.
+
+    Querysets of all registered relations and plugins are combined using
+    UNION ALL and checked for existence, so the database can stop at the
+    first referencing row. Like ``get_all_reference_objects``, only the
+    latest versions of versioned objects are considered.
+
+    :param content: Content object
+    :param state: Optional version state referencing versioned
+                  objects need to be in
+    :param using: Database alias
+    """
+    if state == "all":
+        state = None
+    querysets = []
+    for model, lookups in get_reference_models(content.__class__):
+        queryset = model.objects.using(using).filter(get_filters(content, lookups))
+        querysets.append(filter_latest_referencing_objects(queryset, state))
+
+    source_filter = get_plugin_source_filter(state, using)
+    plugin_querysets = [
+        model.objects.using(using).filter(get_filters(content, lookups))
+        for model, lookups in get_reference_plugins(content.__class__)
+    ]
+    if get_extension().reference_extractors:
+        # Not using get_extracted_reference_plugins, which checks existence
+        # in a separate query
+        extracted = ExtractedReference.objects.using(using).filter(
+            get_generic_filters(
+                content, GenericRelationLookup("content_type", "object_id")
+            )
+        )
+        plugin_querysets.append(
+            CMSPlugin.objects.using(using).filter(pk__in=extracted.values("plugin"))
+        )
+    querysets.extend(queryset.filter(source_filter) for queryset in plugin_querysets)
+
+    if not querysets:
+        return False
+    # Models differ, so only a constant column is selected from each queryset
+    first, *rest = [
+        queryset.order_by().values(reference=Value(1, output_field=IntegerField()))
+        for queryset in querysets
+    ]
+    return first.union(*rest, all=True).exists()
+
+
+def get_reference_target_models():
+    """Returns a list of models registered as targets of reference
+    fields or plugins, e.g. groupers of versioned content.
+    """
+    extension = get_extension()
+    return list(
+        dict.fromkeys(
+            model
+            for registry in (extension.reference_models, extension.reference_plugins)
+            for model, referencing_models in registry.items()
+            if referencing_models
+        )
+    )
+
+
+def _get_generic_referencing_filters(model, lookup, using=None):
+    """Returns a Q object matching objects whose generic foreign key
+    points to the outer object of model, or to one of its contents if
+    model is a grouper of versioned content.
+    """
+    content_types = ContentType.objects.db_manager(using)
+    q = Q(
+        **{
+            lookup.ct_field: content_types.get_for_model(model),
+            lookup.fk_field: OuterRef("pk"),
+        }
+    )
+    versionable = get_versionable_for_grouper(model)
+    if versionable:
+        contents = versionable.content_model._base_manager.using(using).filter(
+            **{versionable.grouper_field_name: OuterRef(OuterRef("pk"))}
+        )
+        q |= Q(
+            **{
+                lookup.ct_field: content_types.get_for_model(versionable.content_model),
+                lookup.fk_field + "__in": contents.values("pk"),
+            }
+        )
+    return q
+
+
+def get_referencing_querysets(model, state=None, using=None):
+    """Yields querysets of objects and plugins referencing the outer
+    object of model, to be used in Exists() subqueries of model's
+    querysets.
+
+    :param model: A model registered as a reference target
+    :param state: Optional version state of referencing objects
+    :param using: Database alias
+    """
+    extension = get_extension()
+    source_filter = get_plugin_source_filter(state, using)
+    for store, is_plugin in (
+        (extension.reference_models, False),
+        (extension.reference_plugins, True),
+    ):
+        for referencing_model, fields in store.get(model, {}).items():
+            for field in fields:
+                queryset = referencing_model._base_manager.using(using).filter(
+                    **{field: OuterRef("pk")}
+                )
+                if is_plugin:
+                    yield queryset.filter(source_filter)
+                else:
+                    yield filter_latest_referencing_objects(queryset, state)
+    for store, is_plugin in (
+        (extension.reference_generic_models, False),
+        (extension.reference_generic_plugins, True),
+    ):
+        for referencing_model, lookups in store.items():
+            for lookup in lookups:
+                queryset = referencing_model._base_manager.using(using).filter(
+                    _get_generic_referencing_filters(model, lookup, using)
+                )
+                if is_plugin:
+                    yield queryset.filter(source_filter)
+                else:
+                    yield filter_latest_referencing_objects(queryset, state)
+    if extension.reference_extractors:
+        extracted = ExtractedReference.objects.using(using).filter(
+            _get_generic_referencing_filters(
+                model, GenericRelationLookup("content_type", "object_id"), using
+            )
+        )
+        yield CMSPlugin.objects.using(using).filter(
+            source_filter, pk__in=extracted.values("plugin")
+        )
+
+
+def get_unreferenced_objects(model, state=None, using=None):
+    """Returns a queryset of objects of model that are not referenced
+    by any registered relation or plugin, using anti-joins
+    (``NOT EXISTS`` subqueries) instead of a lookup per object.
+
+    :param model: A model registered as a reference target,
+                  see ``get_reference_target_models``
+    :param state: Optional version state, references from versioned
+                  objects in other states are ignored
+    :param using: Database alias
+    """
+    queryset = model._base_manager.using(using)
+    for referencing in get_referencing_querysets(model, state, using):
+        queryset = queryset.filter(~Exists(referencing))
+    return queryset.order_by("pk")
+
+
 def version_attr(func):
     """A decorator that turns a function taking a content object into
     a function taking a Version.
@@ -338,3 +1120,759 @@ def version_attr(func):
             return func(obj.versions.all()[0])
 
     return inner
+
+
+def version_annotation(field_name):
+    """Returns a function that takes a content model and returns
+    an expression selecting ``field_name`` of the content's version,
+    suitable for ExtraColumn annotation.
+
+    Values of fields with choices are replaced with their labels,
+    related users are represented by their username.
+
+    The returned function takes a content model and a database alias,
+    and returns None when the model is not versioned.
+    """
+
+    def inner(model, using=None):
+        if not get_versionable_for_content(model):
+            return
+        from djangocms_versioning.models import Version
+
+        versions = Version.objects.filter(
+            content_type=ContentType.objects.db_manager(using).get_for_model(model),
+            object_id=OuterRef("pk"),
+        )
+        field = Version._meta.get_field(field_name)
+        lookup = field_name
+        if field.choices:
+            versions = versions.annotate(
+                _label=Case(
+                    *[
+                        When(**{field_name: key}, then=Value(str(label)))
+                        for key, label in field.flatchoices
+                    ],
+                    default=F(field_name),
+                    output_field=CharField(),
+                )
+            )
+            lookup = "_label"
+        elif field.is_relation:
+            username_field = getattr(field.related_model, "USERNAME_FIELD", "pk")
+            lookup = "{}__{}".format(field_name, username_field)
+        return Subquery(versions.values(lookup)[:1])
+
+    return inner
+
+
+def _has_language_field(model):
+    try:
+        model._meta.get_field("language")
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def has_preview_url(model):
+    """Returns True if objects of model can be rendered by the preview
+    endpoint of django CMS, i.e. model is registered in
+    ``cms_toolbar_enabled_models``. Others (e.g. static placeholders)
+    have no preview url.
+    """
+    return model in apps.get_app_config("cms").cms_extension.toolbar_enabled_models
+
+
+def get_preview_url(obj, preview_urls):
+    """Returns the preview url of obj, or None if its model has no preview.
+
+    The url is only reversed for the first object of each model and
+    language, urls of other objects are derived from it by replacing the pk.
+    Urls with a querystring (e.g. cms's ``live-url`` parameter) may depend
+    on other attributes of the object and are reversed every time.
+
+    :param obj: A model instance
+    :param preview_urls: A dict used as a cache, shared by calls made
+                         while rendering the same references list
+    """
+    if not has_preview_url(obj.__class__):
+        return None
+    pattern = preview_urls.get((obj.__class__, getattr(obj, "language", None)))
+    if pattern:
+        head, tail = pattern
+        return "{}/{}/{}".format(head, obj.pk, tail)
+    url = get_object_preview_url(obj)
+    if pattern is None:
+        head, marker, tail = url.rpartition("/{}/".format(obj.pk))
+        # Urls without the pk as a path segment are reversed every time
+        preview_urls[(obj.__class__, getattr(obj, "language", None))] = (
+            (head, tail) if marker and "?" not in url else False
+        )
+    return url
+
+
+def _get_row_preview_urls(model, rows, preview_urls, using=None):
+    """Yields preview urls of rows returned by ``values()``.
+
+    Model objects are only fetched for rows whose url can't be derived
+    from a cached pattern: the first row of each language, and all rows
+    of models whose urls have to be reversed every time.
+    """
+    if not has_preview_url(model):
+        yield from (None for row in rows)
+        return
+    objects = None
+    for row in rows:
+        pattern = preview_urls.get((model, row.get("language")))
+        if pattern:
+            head, tail = pattern
+            yield "{}/{}/{}".format(head, row["pk"], tail)
+            continue
+        if pattern is None:
+            obj = model._base_manager.using(using).get(pk=row["pk"])
+        else:
+            if objects is None:
+                objects = model._base_manager.using(using).in_bulk(
+                    [row["pk"] for row in rows]
+                )
+            obj = objects[row["pk"]]
+        yield get_preview_url(obj, preview_urls)
+
+
+def attach_preview_urls(querysets, preview_urls=None):
+    """Computes preview urls of all objects in one pass before rendering,
+    storing them in ``references_preview_url`` attribute, which is used
+    by the ``object_preview_url`` template tag.
+
+    :param querysets: List of querysets (or lists) of referencing objects
+    :param preview_urls: Optional dict used as a preview url cache
+    """
+    if preview_urls is None:
+        preview_urls = {}
+    for objects in querysets:
+        for obj in objects:
+            if not isinstance(obj, ReferenceRow):
+                obj.references_preview_url = get_preview_url(obj, preview_urls)
+    return querysets
+
+
+def attach_reference_occurrences(querysets, occurrences, using=None):
+    """Stores lists of ReferenceOccurrences collected by
+    ``get_all_reference_objects`` in ``reference_occurrences`` attribute
+    of referencing objects (or compact rows).
+
+    :param querysets: List of querysets (or lists) of referencing objects
+    :param occurrences: Dict populated by ``get_all_reference_objects``
+    :param using: Database alias
+    """
+    content_types = ContentType.objects.db_manager(using)
+    for objects in querysets:
+        for obj in objects:
+            model = obj.model if isinstance(obj, ReferenceRow) else obj.__class__
+            content_type = content_types.get_for_model(model)
+            obj.reference_occurrences = occurrences.get((content_type.pk, obj.pk), [])
+    return querysets
+
+
+def _get_compact_rows_from_instances(queryset, extra_columns, preview_urls):
+    for obj in queryset:
+        yield ReferenceRow(
+            model=queryset.model,
+            pk=obj.pk,
+            title=get_object_title(obj),
+            language=getattr(obj, "language", None),
+            preview_url=get_preview_url(obj, preview_urls),
+            values=tuple(column.getter(obj) for column in extra_columns),
+            columns=extra_columns,
+        )
+
+
+def _get_compact_rows_from_values(queryset, title_field, extra_columns, preview_urls):
+    model = queryset.model
+    annotations = {}
+    for index, column in enumerate(extra_columns):
+        expression = column.annotation(model, queryset.db)
+        if expression is not None:
+            annotations["_reference_column_{}".format(index)] = expression
+    fields = ["pk", title_field]
+    if _has_language_field(model):
+        fields.append("language")
+    # prefetches are not supported by values() querysets and are not needed
+    rows = list(queryset.prefetch_related(None).values(*fields, **annotations))
+    urls = _get_row_preview_urls(model, rows, preview_urls, queryset.db)
+    for row, preview_url in zip(rows, urls):
+        yield ReferenceRow(
+            model=model,
+            pk=row["pk"],
+            title=row[title_field],
+            language=row.get("language"),
+            preview_url=preview_url,
+            values=tuple(
+                row.get("_reference_column_{}".format(index))
+                for index in range(len(extra_columns))
+            ),
+            columns=extra_columns,
+        )
+
+
+def get_compact_rows(queryset, extra_columns, preview_urls=None):
+    """Returns a list of ReferenceRow objects representing objects
+    of the provided queryset.
+
+    When a title field has been registered for the queryset's model
+    and all extra columns define annotations, rows are populated using
+    ``values()``, without instantiating any model objects. Otherwise rows
+    are built from model instances, which are discarded right away.
+
+    :param queryset: A queryset
+    :param extra_columns: List of ExtraColumn objects
+    :param preview_urls: Optional dict used as a preview url cache
+    """
+    if preview_urls is None:
+        preview_urls = {}
+    title_field = get_title_field(queryset.model)
+    if title_field is None or any(
+        column.annotation is None for column in extra_columns
+    ):
+        return list(
+            _get_compact_rows_from_instances(queryset, extra_columns, preview_urls)
+        )
+    return list(
+        _get_compact_rows_from_values(
+            queryset, title_field, extra_columns, preview_urls
+        )
+    )
+
+
+def get_references_for_display(querysets, extra_columns):
+    """Converts the querysets to lists of compact rows if
+    ``DJANGOCMS_REFERENCES_COMPACT_ROWS`` is enabled, otherwise
+    returns them unchanged. Preview urls are computed for all objects.
+    """
+    preview_urls = {}
+    if is_compact_rows_enabled():
+        return [get_compact_rows(qs, extra_columns, preview_urls) for qs in querysets]
+    return attach_preview_urls(querysets, preview_urls)
+
+
+def get_page_size():
+    return getattr(settings, "DJANGOCMS_REFERENCES_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+
+
+def _sort_values_queryset(queryset, search=None):
+    """Converts a queryset to a ValuesQuerySet containing content type,
+    pk and the values references can be sorted by.
+
+    Returns None if the queryset cannot match the search term.
+    """
+    model = queryset.model
+    title_field = get_title_field(model)
+    if search:
+        if title_field is None:
+            return
+        queryset = queryset.filter(
+            **{"{}__icontains".format(title_field): search}
+        )
+    content_type = ContentType.objects.db_manager(queryset.db).get_for_model(model)
+
+    def version_value(field_name, output_field):
+        expression = version_annotation(field_name)(model, queryset.db)
+        if expression is None:
+            return Value(None, output_field=output_field)
+        return expression
+
+    # NOTE: annotations have to be defined in the same order for all
+    # querysets, as they are combined using UNION
+    return (
+        queryset.order_by()
+        .prefetch_related(None)
+        .annotate(
+            _ref_content_type=Value(content_type.pk, output_field=IntegerField()),
+            _ref_pk=F("pk"),
+            _ref_model=Value(model._meta.model_name, output_field=CharField()),
+            _ref_title=(
+                F(title_field) if title_field
+                else Value("", output_field=CharField())
+            ),
+            _ref_state=version_value("state", CharField()),
+            _ref_author=version_value("created_by", CharField()),
+            _ref_modified=version_value("modified", DateTimeField()),
+        )
+        .values(
+            "_ref_content_type",
+            "_ref_pk",
+            "_ref_model",
+            "_ref_title",
+            "_ref_state",
+            "_ref_author",
+            "_ref_modified",
+        )
+    )
+
+
+def get_sorted_references(querysets, sort="title", search=None):
+    """Combines querysets of referencing objects into a single
+    ValuesQuerySet of ``_ref_content_type`` and ``_ref_pk`` values,
+    ordered by ``sort`` in the database.
+
+    Slicing the result (e.g. with a Paginator) only fetches the selected
+    rows, which can then be loaded with ``get_references_by_values``.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    :param sort: One of SORT_OPTIONS keys, optionally prefixed with "-"
+                 for descending order
+    :param search: Search term matched against objects' title fields.
+                   Objects of models without a registered title field
+                   are excluded when searching.
+    """
+    sort_key = sort.lstrip("-")
+    if sort_key not in dict(SORT_OPTIONS):
+        raise ValueError("Unknown sort option: {}".format(sort))
+    sort_field = "_ref_model" if sort_key == "content_type" else "_ref_" + sort_key
+    prefix = "-" if sort.startswith("-") else ""
+
+    values_querysets = [
+        qs for qs in (_sort_values_queryset(qs, search) for qs in querysets)
+        if qs is not None
+    ]
+    if not values_querysets:
+        return []
+    first, *rest = values_querysets
+    combined = first.union(*rest, all=True) if rest else first
+    return combined.order_by(
+        prefix + sort_field, prefix + "_ref_content_type", prefix + "_ref_pk"
+    )
+
+
+def get_references_by_values(querysets, values, extra_columns=None, compact=None):
+    """Loads referencing objects for values returned by
+    get_sorted_references, preserving their order.
+
+    Issues a single query per model. Objects are converted to compact
+    rows if those are enabled.
+
+    :param querysets: List of querysets the values were built from
+    :param values: Iterable of dicts with _ref_content_type and _ref_pk keys
+    :param extra_columns: List of ExtraColumn objects used for compact rows
+    :param compact: Forces (or disables) compact rows, defaults to
+                    ``DJANGOCMS_REFERENCES_COMPACT_ROWS`` setting
+    """
+    if compact is None:
+        compact = is_compact_rows_enabled()
+    values = list(values)
+    pks_by_content_type = defaultdict(list)
+    for value in values:
+        pks_by_content_type[value["_ref_content_type"]].append(value["_ref_pk"])
+
+    querysets_by_model = {qs.model: qs for qs in querysets}
+    content_types = ContentType.objects.db_manager(
+        querysets[0].db if querysets else None
+    )
+    objects = {}
+    preview_urls = {}
+    for content_type_id, pks in pks_by_content_type.items():
+        model = content_types.get_for_id(content_type_id).model_class()
+        queryset = querysets_by_model[model].filter(pk__in=pks)
+        if compact:
+            queryset = get_compact_rows(queryset, extra_columns or [], preview_urls)
+        else:
+            queryset = attach_preview_urls([queryset], preview_urls)[0]
+        for obj in queryset:
+            objects[(content_type_id, obj.pk)] = obj
+    return [
+        objects[(value["_ref_content_type"], value["_ref_pk"])]
+        for value in values
+        if (value["_ref_content_type"], value["_ref_pk"]) in objects
+    ]
+
+
+def get_summary_threshold():
+    return getattr(
+        settings, "DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD", DEFAULT_SUMMARY_THRESHOLD
+    )
+
+
+def filter_by_content_type(querysets, content_type_id):
+    """Returns only the querysets of the model with provided content type."""
+    return [
+        qs for qs in querysets
+        if ContentType.objects.db_manager(qs.db).get_for_model(qs.model).pk
+        == content_type_id
+    ]
+
+
+def _get_reference_summary(counted_querysets):
+    content_types = []
+    languages = Counter()
+    for queryset, count in counted_querysets:
+        if not count:
+            continue
+        content_types.append(
+            (
+                ContentType.objects.db_manager(queryset.db).get_for_model(
+                    queryset.model
+                ),
+                count,
+            )
+        )
+        if _has_language_field(queryset.model):
+            language_counts = (
+                queryset.order_by()
+                .prefetch_related(None)
+                .values("language")
+                .annotate(count=Count("pk"))
+            )
+            for row in language_counts:
+                languages[row["language"]] += row["count"]
+    state_counts = get_reference_state_counts(
+        [queryset for queryset, count in counted_querysets if count]
+    )
+    states = []
+    if state_counts:
+        from djangocms_versioning.constants import VERSION_STATES
+
+        states = [
+            (key, label, state_counts[key])
+            for key, label in VERSION_STATES
+            if key in state_counts
+        ]
+    return ReferenceSummary(
+        total=sum(count for content_type, count in content_types),
+        content_types=content_types,
+        languages=sorted(languages.items()),
+        states=states,
+    )
+
+
+def get_reference_summary(querysets):
+    """Returns a ReferenceSummary with counts of referencing objects
+    per content type, language and version state.
+
+    Counts are computed with aggregate queries, without loading any objects.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    """
+    return _get_reference_summary([(qs, qs.count()) for qs in querysets])
+
+
+def get_summary_if_above_threshold(querysets):
+    """Returns a ReferenceSummary if there are more referencing objects
+    than ``DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD``, otherwise None.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    """
+    threshold = get_summary_threshold()
+    if threshold is None:
+        return
+    counted_querysets = [(qs, qs.count()) for qs in querysets]
+    if sum(count for qs, count in counted_querysets) > threshold:
+        return _get_reference_summary(counted_querysets)
+
+
+def is_streaming_enabled():
+    return getattr(settings, "DJANGOCMS_REFERENCES_STREAMING", False)
+
+
+def get_streaming_chunk_size():
+    return getattr(
+        settings,
+        "DJANGOCMS_REFERENCES_STREAMING_CHUNK_SIZE",
+        DEFAULT_STREAMING_CHUNK_SIZE,
+    )
+
+
+def iterate_references(querysets, chunk_size):
+    """Yields lists of at most ``chunk_size`` referencing objects,
+    with preview urls attached. Querysets are iterated using
+    ``.iterator()``, so objects are not cached by querysets.
+
+    Prefetches of querysets are applied to each chunk, as ``.iterator()``
+    ignores them before Django 4.1.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    :param chunk_size: Maximum number of objects per chunk
+    """
+    preview_urls = {}
+    for queryset in querysets:
+        lookups = queryset._prefetch_related_lookups
+        chunk = []
+        for obj in queryset.prefetch_related(None).iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) == chunk_size:
+                yield _prepare_chunk(chunk, lookups, preview_urls)
+                chunk = []
+        if chunk:
+            yield _prepare_chunk(chunk, lookups, preview_urls)
+
+
+def _prepare_chunk(chunk, lookups, preview_urls):
+    prefetch_related_objects(chunk, *lookups)
+    return attach_preview_urls([chunk], preview_urls)[0]
+
+
+def is_progressive_loading_enabled():
+    return getattr(settings, "DJANGOCMS_REFERENCES_PROGRESSIVE_LOADING", False)
+
+
+def get_reference_content_types(querysets):
+    """Returns content types of the models of provided querysets,
+    without loading any referencing objects.
+
+    :param querysets: List of querysets returned by get_all_reference_objects
+    """
+    return [
+        ContentType.objects.db_manager(queryset.db).get_for_model(queryset.model)
+        for queryset in querysets
+    ]
+
+
+def is_watermark_enabled():
+    return getattr(settings, "DJANGOCMS_REFERENCES_WATERMARK", False)
+
+
+def get_watermark():
+    """Returns a token that changes whenever an object that can affect
+    references is saved or deleted (see ``handlers.update_watermark``).
+
+    A new token is generated when the cache entry is missing, so an
+    evicted watermark never matches a previously issued one.
+    """
+    watermark = cache.get(WATERMARK_CACHE_KEY)
+    if watermark is None:
+        cache.add(WATERMARK_CACHE_KEY, uuid.uuid4().hex, None)
+        watermark = cache.get(WATERMARK_CACHE_KEY)
+    return watermark
+
+
+def update_watermark():
+    cache.set(WATERMARK_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def get_source_placeholders(source, using=None):
+    """Returns a queryset of placeholders of the source object."""
+    content_type = ContentType.objects.db_manager(using).get_for_model(source)
+    return Placeholder.objects.using(using).filter(
+        content_type=content_type, object_id=source.pk
+    )
+
+
+def _get_referenced_objects(target_model, queryset, field_name, using=None):
+    return target_model._base_manager.using(using).filter(
+        pk__in=queryset.order_by().values(field_name)
+    )
+
+
+def _get_generic_referenced_objects(values, using=None):
+    """Yields querysets of objects identified by (content type id,
+    object id) pairs, one queryset per content type.
+
+    :param values: Iterable of (content type id, object id) pairs
+    """
+    ids_by_content_type = defaultdict(set)
+    for content_type_id, object_id in values:
+        ids_by_content_type[content_type_id].add(object_id)
+    for content_type_id, ids in ids_by_content_type.items():
+        content_type = ContentType.objects.db_manager(using).get_for_id(content_type_id)
+        yield content_type.get_all_objects_for_this_type(pk__in=ids)
+
+
+def get_outgoing_references(source, using=None, language=None):
+    """Returns a list of querysets of objects the source object depends on:
+    objects referenced by its own registered fields and objects referenced
+    by registered plugins in its placeholders.
+
+    Querysets of the same model are combined. Versioned objects are
+    represented by their groupers, as registered.
+
+    :param source: A source object, e.g. a PageContent
+    :param using: Database alias
+    :param language: Optional language of plugins
+    """
+    extension = get_extension()
+    source_model = source.__class__
+    plugin_filters = Q(placeholder__in=get_source_placeholders(source, using))
+    if language:
+        plugin_filters &= Q(language=language)
+    querysets = []
+
+    for target_model, models in extension.reference_plugins.items():
+        for plugin_model, fields in models.items():
+            plugin_queryset = plugin_model._base_manager.using(using).filter(
+                plugin_filters
+            )
+            for field_name in fields:
+                querysets.append(
+                    _get_referenced_objects(
+                        target_model, plugin_queryset, field_name, using
+                    )
+                )
+
+    for target_model, models in extension.reference_models.items():
+        source_queryset = source_model._base_manager.using(using).filter(pk=source.pk)
+        for field_name in models.get(source_model, ()):
+            querysets.append(
+                _get_referenced_objects(target_model, source_queryset, field_name, using)
+            )
+
+    generic_values = []
+    for model, lookups in extension.reference_generic_plugins.items():
+        plugin_queryset = model._base_manager.using(using).filter(plugin_filters)
+        for lookup in lookups:
+            generic_values.extend(
+                plugin_queryset.values_list(lookup.ct_field, lookup.fk_field)
+            )
+    for lookup in extension.reference_generic_models.get(source_model, ()):
+        generic_values.extend(
+            source_model._base_manager.using(using)
+            .filter(pk=source.pk)
+            .values_list(lookup.ct_field, lookup.fk_field)
+        )
+    if extension.reference_extractors:
+        generic_values.extend(
+            ExtractedReference.objects.using(using)
+            .filter(
+                plugin__in=CMSPlugin.objects.using(using).filter(plugin_filters)
+            )
+            .values_list("content_type", "object_id")
+        )
+    querysets.extend(_get_generic_referenced_objects(generic_values, using))
+
+    return list(
+        combine_querysets_of_same_models([qs for qs in querysets if qs.exists()])
+    )
+
+
+def _get_plugin_source_rows(queryset, fields, using=None, prefix=""):
+    """Returns a ValuesListQuerySet of content type id and object id of
+    placeholder sources of plugins (the static placeholder for plugins in
+    static placeholders), followed by ``fields``.
+
+    :param queryset: Plugin queryset, or a queryset of a model related
+                     to plugins through ``prefix``
+    :param fields: Names of additional fields
+    :param using: Database alias
+    :param prefix: Lookup prefix of the plugin
+    """
+    placeholder = prefix + "placeholder"
+    if StaticPlaceholder is None:
+        static_placeholder = Value(None, output_field=IntegerField())
+    else:
+        static_placeholder = Subquery(
+            StaticPlaceholder.objects.using(using)
+            .filter(Q(draft=OuterRef(placeholder)) | Q(public=OuterRef(placeholder)))
+            .values("pk")[:1]
+        )
+    return (
+        queryset.order_by()
+        .annotate(_ref_static_placeholder=static_placeholder)
+        .values_list(
+            placeholder + "__content_type",
+            placeholder + "__object_id",
+            "_ref_static_placeholder",
+            *fields
+        )
+    )
+
+
+def iterate_reference_edges(using=None, chunk_size=None):
+    """Yields a ReferenceEdge for every reference of registered fields,
+    generic foreign keys, plugins and extracted plugin references.
+
+    Edges are streamed from chunked queries, one per registered field, so
+    memory usage does not depend on the number of references. Plugins are
+    represented by their placeholder's source object, or by the static
+    placeholder they belong to. Plugins in other placeholders without a
+    source are skipped.
+
+    :param using: Database alias
+    :param chunk_size: Number of rows fetched at once, defaults to
+                       ``DJANGOCMS_REFERENCES_STREAMING_CHUNK_SIZE``
+    """
+    extension = get_extension()
+    chunk_size = chunk_size or get_streaming_chunk_size()
+    content_types = ContentType.objects.db_manager(using)
+    static_placeholder_type = (
+        content_types.get_for_model(StaticPlaceholder).pk
+        if StaticPlaceholder is not None
+        else None
+    )
+
+    def get_plugin_edges(rows, relation, target_type=None):
+        for source_type, source_id, static_placeholder_id, *target in rows.iterator(
+            chunk_size=chunk_size
+        ):
+            if source_type is None:
+                if static_placeholder_id is None:
+                    continue
+                source_type, source_id = static_placeholder_type, static_placeholder_id
+            if target_type is not None:
+                target = [target_type] + target
+            yield ReferenceEdge(source_type, source_id, *target, relation)
+
+    for target_model, models in extension.reference_models.items():
+        target_type = content_types.get_for_model(target_model).pk
+        for model, fields in models.items():
+            source_type = content_types.get_for_model(model).pk
+            for field_name in fields:
+                rows = (
+                    model._base_manager.using(using)
+                    .filter(**{field_name + "__isnull": False})
+                    .order_by()
+                    .values_list("pk", field_name)
+                )
+                relation = "{}.{}".format(model._meta.label_lower, field_name)
+                for source_id, target_id in rows.iterator(chunk_size=chunk_size):
+                    yield ReferenceEdge(
+                        source_type, source_id, target_type, target_id, relation
+                    )
+
+    for target_model, models in extension.reference_plugins.items():
+        target_type = content_types.get_for_model(target_model).pk
+        for model, fields in models.items():
+            for field_name in fields:
+                rows = _get_plugin_source_rows(
+                    model._base_manager.using(using).filter(
+                        **{field_name + "__isnull": False}
+                    ),
+                    [field_name],
+                    using,
+                )
+                relation = "{}.{}".format(model._meta.label_lower, field_name)
+                yield from get_plugin_edges(rows, relation, target_type)
+
+    for model, lookups in extension.reference_generic_models.items():
+        source_type = content_types.get_for_model(model).pk
+        for lookup in lookups:
+            rows = (
+                model._base_manager.using(using)
+                .filter(**{lookup.fk_field + "__isnull": False})
+                .order_by()
+                .values_list("pk", lookup.ct_field, lookup.fk_field)
+            )
+            relation = "{}.{}".format(model._meta.label_lower, lookup.fk_field)
+            for source_id, target_type, target_id in rows.iterator(
+                chunk_size=chunk_size
+            ):
+                yield ReferenceEdge(
+                    source_type, source_id, target_type, target_id, relation
+                )
+
+    for model, lookups in extension.reference_generic_plugins.items():
+        for lookup in lookups:
+            rows = _get_plugin_source_rows(
+                model._base_manager.using(using).filter(
+                    **{lookup.fk_field + "__isnull": False}
+                ),
+                [lookup.ct_field, lookup.fk_field],
+                using,
+            )
+            relation = "{}.{}".format(model._meta.label_lower, lookup.fk_field)
+            yield from get_plugin_edges(rows, relation)
+
+    if extension.reference_extractors:
+        rows = _get_plugin_source_rows(
+            ExtractedReference.objects.using(using),
+            ["content_type", "object_id"],
+            using,
+            prefix="plugin__",
+        )
+        yield from get_plugin_edges(rows, ExtractedReference._meta.label_lower)
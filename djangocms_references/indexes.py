@@ -0,0 +1,145 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import names_digest
+
+from cms.models import CMSPlugin, Placeholder
+
+from .compat import VERSIONING_INSTALLED
+from .datastructures import IndexRequirement
+from .helpers import get_extension, get_versionable_for_grouper
+from .models import ExtractedReference
+
+
+def get_relation_requirements(model, field_name):
+    """Yields IndexRequirements for every column that is joined or
+    filtered on when following ``field_name`` from ``model``.
+
+    :param model: Model the lookup starts from
+    :param field_name: Field name, can span relations using ``__``
+
+    Example:
+    get_relation_requirements(DeeplyNestedPollPlugin, "deeply_nested_poll__nested_poll__poll") ->
+    [
+        IndexRequirement(DeeplyNestedPollPlugin, ("deeply_nested_poll",)),
+        IndexRequirement(DeeplyNestedPoll, ("nested_poll",)),
+        IndexRequirement(NestedPoll, ("poll",)),
+    ]
+    """
+    for name in field_name.split("__"):
+        field = model._meta.get_field(name)
+        if field.many_to_many:
+            # Auto-created through tables are always indexed
+            pass
+        elif field.concrete:
+            yield IndexRequirement(field.model, (field.name,))
+        elif field.auto_created:
+            # Reverse side of a foreign key, the column lives on the related model
+            remote_field = field.remote_field
+            yield IndexRequirement(remote_field.model, (remote_field.name,))
+        model = field.related_model
+
+
+def get_index_requirements():
+    """Returns a list of IndexRequirements for all lookups performed
+    while retrieving references of registered models.
+    """
+    extension = get_extension()
+    requirements = [
+        IndexRequirement(CMSPlugin, ("placeholder",)),
+        IndexRequirement(Placeholder, ("content_type", "object_id")),
+    ]
+    if VERSIONING_INSTALLED:
+        from djangocms_versioning.models import Version
+
+        requirements.append(IndexRequirement(Version, ("content_type", "object_id")))
+
+    for store in (extension.reference_models, extension.reference_plugins):
+        for target_model, models in store.items():
+            versionable = get_versionable_for_grouper(target_model)
+            if versionable:
+                # Versioned lookups continue from the grouper to its contents
+                requirements.append(
+                    IndexRequirement(
+                        versionable.content_model, (versionable.grouper_field.name,)
+                    )
+                )
+            for model, fields in models.items():
+                for field_name in fields:
+                    requirements.extend(get_relation_requirements(model, field_name))
+
+    for store in (
+        extension.reference_generic_models,
+        extension.reference_generic_plugins,
+    ):
+        for model, lookups in store.items():
+            for lookup in lookups:
+                requirements.append(
+                    IndexRequirement(model, (lookup.ct_field, lookup.fk_field))
+                )
+
+    if extension.reference_extractors:
+        requirements.append(
+            IndexRequirement(ExtractedReference, ("content_type", "object_id"))
+        )
+
+    # Remove duplicates, preserving order
+    return list(dict.fromkeys(requirements))
+
+
+def get_requirement_columns(requirement):
+    opts = requirement.model._meta
+    return [opts.get_field(field_name).column for field_name in requirement.fields]
+
+
+def is_indexed(requirement, constraints):
+    """Checks if any of the introspected constraints can serve
+    lookups against the required columns.
+
+    :param requirement: IndexRequirement
+    :param constraints: Result of ``introspection.get_constraints``
+    """
+    columns = get_requirement_columns(requirement)
+    for constraint in constraints.values():
+        if not (
+            constraint["index"] or constraint["unique"] or constraint["primary_key"]
+        ):
+            continue
+        # Required columns need to be the leading columns of the index
+        leading_columns = (constraint["columns"] or [])[:len(columns)]
+        if sorted(leading_columns) == sorted(columns):
+            return True
+    return False
+
+
+def get_missing_indexes(using=DEFAULT_DB_ALIAS):
+    """Returns a list of IndexRequirements that are not satisfied
+    by indexes existing in the database.
+
+    Tables that don't exist in the database are skipped.
+
+    :param using: Database alias
+    """
+    connection = connections[using]
+    missing = []
+    constraints = {}
+    with connection.cursor() as cursor:
+        table_names = set(connection.introspection.table_names(cursor))
+        for requirement in get_index_requirements():
+            table = requirement.model._meta.db_table
+            if table not in table_names:
+                continue
+            if table not in constraints:
+                constraints[table] = connection.introspection.get_constraints(
+                    cursor, table
+                )
+            if not is_indexed(requirement, constraints[table]):
+                missing.append(requirement)
+    return missing
+
+
+def get_index_name(requirement):
+    """Returns a deterministic index name, short enough for all
+    database backends.
+    """
+    table = requirement.model._meta.db_table
+    digest = names_digest(table, *requirement.fields, length=8)
+    return "{}_{}_ref".format(table[:16], digest)
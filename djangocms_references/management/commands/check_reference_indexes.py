@@ -0,0 +1,125 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from djangocms_references.indexes import (
+    get_index_name,
+    get_missing_indexes,
+    get_requirement_columns,
+)
+
+
+MIGRATION_TEMPLATE = '''\
+from django.db import migrations, models
+
+
+INDEXES = [
+{indexes}
+]
+
+
+def add_indexes(apps, schema_editor):
+    for app_label, model_name, name, fields in INDEXES:
+        model = apps.get_model(app_label, model_name)
+        schema_editor.add_index(model, models.Index(fields=fields, name=name))
+
+
+def remove_indexes(apps, schema_editor):
+    for app_label, model_name, name, fields in INDEXES:
+        model = apps.get_model(app_label, model_name)
+        schema_editor.remove_index(model, models.Index(fields=fields, name=name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+{dependencies}
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports database columns used by reference lookups that are not "
+        "covered by an index, optionally generating a migration adding them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to inspect. Defaults to the 'default' database.",
+        )
+        parser.add_argument(
+            "--generate-migration",
+            metavar="APP_LABEL",
+            dest="app_label",
+            help="Write a migration adding the missing indexes to the given app.",
+        )
+
+    def handle(self, *args, **options):
+        app_label = options["app_label"]
+        if app_label:
+            try:
+                apps.get_app_config(app_label)
+            except LookupError as e:
+                raise CommandError(str(e)) from e
+
+        missing = get_missing_indexes(using=options["database"])
+        if not missing:
+            self.stdout.write("All columns used by reference lookups are indexed.")
+            return
+
+        for requirement in missing:
+            self.stdout.write(
+                "Missing index on {table} ({columns})".format(
+                    table=requirement.model._meta.db_table,
+                    columns=", ".join(get_requirement_columns(requirement)),
+                )
+            )
+
+        if app_label:
+            path = self.write_migration(app_label, missing)
+            self.stdout.write(self.style.SUCCESS("Created migration {}".format(path)))
+
+    def write_migration(self, app_label, requirements):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        dependencies = set(loader.graph.leaf_nodes(app_label))
+        for requirement in requirements:
+            dependencies.update(
+                loader.graph.leaf_nodes(requirement.model._meta.app_label)
+            )
+
+        numbers = [
+            MigrationAutodetector.parse_number(name) or 0
+            for label, name in loader.graph.nodes
+            if label == app_label
+        ]
+        name = "{:04d}_djangocms_references_indexes".format(max(numbers, default=0) + 1)
+        writer = MigrationWriter(migrations.Migration(name, app_label))
+
+        indexes = "\n".join(
+            "    ({!r}, {!r}, {!r}, {!r}),".format(
+                requirement.model._meta.app_label,
+                requirement.model._meta.model_name,
+                get_index_name(requirement),
+                list(requirement.fields),
+            )
+            for requirement in requirements
+        )
+        dependencies = "\n".join(
+            "        ({!r}, {!r}),".format(*dependency)
+            for dependency in sorted(dependencies)
+        )
+        with open(writer.path, "w", encoding="utf-8") as fh:
+            fh.write(
+                MIGRATION_TEMPLATE.format(indexes=indexes, dependencies=dependencies)
+            )
+        return writer.path
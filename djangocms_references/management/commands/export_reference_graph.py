@@ -0,0 +1,108 @@
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from djangocms_references.helpers import iterate_reference_edges
+
+
+FORMATS = ("jsonl", "dot", "graphml")
+
+GRAPHML_HEADER = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="relation" for="edge" attr.name="relation" attr.type="string"/>
+  <graph id="references" edgedefault="directed">
+"""
+GRAPHML_FOOTER = """\
+  </graph>
+</graphml>
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports the graph of references between objects, with an edge for "
+        "every reference of registered fields and plugins."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="jsonl",
+            help="Output format. Defaults to 'jsonl', one JSON object per edge.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File the graph is written to. Defaults to standard output.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to query. Defaults to the 'default' database.",
+        )
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        write = getattr(self, "write_{}".format(options["format"]))
+        edges = iterate_reference_edges(using=self.using)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                write(edges, fh.write)
+        else:
+            write(edges, lambda line: self.stdout.write(line, ending=""))
+
+    def get_node_id(self, content_type_id, object_id):
+        content_type = ContentType.objects.db_manager(self.using).get_for_id(
+            content_type_id
+        )
+        return "{}.{}:{}".format(content_type.app_label, content_type.model, object_id)
+
+    def get_edge_nodes(self, edge):
+        return (
+            self.get_node_id(edge.source_type, edge.source_id),
+            self.get_node_id(edge.target_type, edge.target_id),
+        )
+
+    def write_jsonl(self, edges, write):
+        for edge in edges:
+            source, target = self.get_edge_nodes(edge)
+            write(
+                json.dumps(
+                    {"source": source, "target": target, "relation": edge.relation}
+                )
+                + "\n"
+            )
+
+    def write_dot(self, edges, write):
+        write("digraph references {\n")
+        for edge in edges:
+            source, target = self.get_edge_nodes(edge)
+            write(
+                "  {} -> {} [label={}];\n".format(
+                    json.dumps(source), json.dumps(target), json.dumps(edge.relation)
+                )
+            )
+        write("}\n")
+
+    def write_graphml(self, edges, write):
+        # GraphML requires nodes to be declared, so ids of written nodes
+        # are kept in memory. Edges are still written as they are read.
+        nodes = set()
+        write(GRAPHML_HEADER)
+        for edge in edges:
+            source, target = self.get_edge_nodes(edge)
+            for node in (source, target):
+                if node not in nodes:
+                    nodes.add(node)
+                    write("    <node id={}/>\n".format(quoteattr(node)))
+            write(
+                "    <edge source={} target={}>"
+                '<data key="relation">{}</data></edge>\n'.format(
+                    quoteattr(source), quoteattr(target), escape(edge.relation)
+                )
+            )
+        write(GRAPHML_FOOTER)
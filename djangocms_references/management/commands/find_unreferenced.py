@@ -0,0 +1,63 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from djangocms_references.helpers import (
+    get_reference_target_models,
+    get_streaming_chunk_size,
+    get_unreferenced_objects,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Lists objects of models registered as reference targets "
+        "(e.g. aliases and snippets) that are not referenced anywhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to query. Defaults to the 'default' database.",
+        )
+        parser.add_argument(
+            "--model",
+            metavar="APP_LABEL.MODEL_NAME",
+            action="append",
+            dest="models",
+            help="Only check the given target model. Can be used multiple times.",
+        )
+        parser.add_argument(
+            "--state",
+            help=(
+                "Only consider references from versioned objects in the given "
+                "version state, e.g. 'published'."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        target_models = get_reference_target_models()
+        if options["models"]:
+            try:
+                models = [apps.get_model(label) for label in options["models"]]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e)) from e
+            unknown = [model for model in models if model not in target_models]
+            if unknown:
+                raise CommandError(
+                    "{} is not a registered reference target".format(
+                        unknown[0]._meta.label
+                    )
+                )
+            target_models = models
+
+        chunk_size = get_streaming_chunk_size()
+        for model in target_models:
+            queryset = get_unreferenced_objects(
+                model, state=options["state"], using=options["database"]
+            )
+            # Only pks are listed, str() of groupers usually loads their contents
+            pks = queryset.values_list("pk", flat=True)
+            for pk in pks.iterator(chunk_size=chunk_size):
+                self.stdout.write("{}\t{}".format(model._meta.label_lower, pk))
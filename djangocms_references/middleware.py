@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+
+
+LAST_WRITE_SESSION_KEY = "djangocms_references_last_write"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def has_recent_write(request):
+    """Returns True if the session of the provided request performed a write
+    within ``DJANGOCMS_REFERENCES_READ_AFTER_WRITE_TIMEOUT`` seconds.
+
+    :param request: A request object
+    """
+    session = getattr(request, "session", None)
+    if session is None:
+        return False
+    last_write = session.get(LAST_WRITE_SESSION_KEY)
+    if last_write is None:
+        return False
+    timeout = getattr(settings, "DJANGOCMS_REFERENCES_READ_AFTER_WRITE_TIMEOUT", 5)
+    return time.time() - last_write < timeout
+
+
+def _is_staff_request(request):
+    user = getattr(request, "user", None)
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+class ReadAfterWriteMiddleware:
+    """Records the time of the last write request in the session, so that
+    reference queries of the same session can be routed to the default
+    database while a read replica might still be lagging behind.
+
+    Only write requests of staff users are recorded, as only they can
+    display references. The session is left untouched while a previous
+    write is still inside the consistency window, avoiding a session
+    save on every request.
+
+    Needs to be placed after ``SessionMiddleware`` and
+    ``AuthenticationMiddleware``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method not in SAFE_METHODS
+            and hasattr(request, "session")
+            and _is_staff_request(request)
+            and not has_recent_write(request)
+        ):
+            request.session[LAST_WRITE_SESSION_KEY] = time.time()
+        return response
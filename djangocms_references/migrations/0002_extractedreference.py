@@ -0,0 +1,64 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cms", "__first__"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("djangocms_references", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExtractedReference",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField(verbose_name="object id")),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                        verbose_name="content type",
+                    ),
+                ),
+                (
+                    "plugin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="extracted_references",
+                        to="cms.cmsplugin",
+                        verbose_name="plugin",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "extracted reference",
+                "verbose_name_plural": "extracted references",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="extractedreference",
+            index=models.Index(
+                fields=["content_type", "object_id"],
+                name="djangocms_ref_extracted_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="extractedreference",
+            constraint=models.UniqueConstraint(
+                fields=("plugin", "content_type", "object_id"),
+                name="djangocms_ref_extracted_unique",
+            ),
+        ),
+    ]
@@ -1,6 +1,10 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from cms.models import CMSPlugin
+
 
 class References(models.Model):
     """Dummy model used for permission handling. No DB tables are
@@ -11,3 +15,40 @@ class References(models.Model):
         managed = False
         default_permissions = ()
         permissions = (("show_references", _("Can show references")),)
+
+
+class ExtractedReference(models.Model):
+    """A reference found in a plugin's body by one of the registered
+    reference extractors, recorded when the plugin is saved.
+    """
+
+    plugin = models.ForeignKey(
+        CMSPlugin,
+        on_delete=models.CASCADE,
+        related_name="extracted_references",
+        verbose_name=_("plugin"),
+    )
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, verbose_name=_("content type")
+    )
+    object_id = models.PositiveIntegerField(_("object id"))
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    class Meta:
+        verbose_name = _("extracted reference")
+        verbose_name_plural = _("extracted references")
+        indexes = [
+            models.Index(
+                fields=["content_type", "object_id"],
+                name="djangocms_ref_extracted_idx",
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["plugin", "content_type", "object_id"],
+                name="djangocms_ref_extracted_unique",
+            )
+        ]
+
+    def __str__(self):
+        return "{} -> {}:{}".format(self.plugin_id, self.content_type_id, self.object_id)
@@ -1,15 +1,72 @@
-
 function sideframeCloseHandler(event) {
   try {
     window.top.CMS.API.Sideframe.close();
   } catch (event) {}
 }
 
-document.addEventListener('DOMContentLoaded', function(event) {
-  /* Close the Sideframe on click */
-  const triggerList = document.querySelectorAll('.js-djangocms-references-close-sideframe');
+function bindSideframeClose(container) {
+  const triggerList = container.querySelectorAll('.js-djangocms-references-close-sideframe');
 
   triggerList.forEach(function(trigger) {
       trigger.addEventListener('click', sideframeCloseHandler);
   });
+}
+
+function groupToggleHandler(event) {
+  event.preventDefault();
+  const group = event.target.closest('.js-djangocms-references-group');
+
+  if (group.dataset.loaded) {
+    /* Rows are already loaded, only toggle their visibility */
+    group.classList.toggle('collapsed');
+    return;
+  }
+  if (group.dataset.loading) {
+    return;
+  }
+  group.dataset.loading = 'true';
+
+  /* Remove the error row of a previous attempt */
+  const errorRow = group.querySelector('.js-djangocms-references-group-error');
+  if (errorRow) {
+    errorRow.remove();
+  }
+
+  fetch(group.dataset.url, {credentials: 'same-origin'})
+    .then(function(response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function(html) {
+      group.insertAdjacentHTML('beforeend', html);
+      bindSideframeClose(group);
+      group.dataset.loaded = 'true';
+    })
+    .catch(function() {
+      /* Rows are not marked as loaded, so that expanding the group retries */
+      const row = document.createElement('tr');
+      const cell = document.createElement('td');
+      row.className = 'js-djangocms-references-group-error';
+      cell.colSpan = group.querySelector('th').colSpan;
+      cell.textContent = group.dataset.error;
+      row.appendChild(cell);
+      group.appendChild(row);
+    })
+    .finally(function() {
+      delete group.dataset.loading;
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function(event) {
+  /* Close the Sideframe on click */
+  bindSideframeClose(document);
+
+  /* Load rows of a reference group when it is expanded */
+  const groupToggleList = document.querySelectorAll('.js-djangocms-references-group-toggle');
+
+  groupToggleList.forEach(function(toggle) {
+      toggle.addEventListener('click', groupToggleHandler);
+  });
 });
@@ -1,8 +1,10 @@
 from django import template
 from django.contrib.contenttypes.models import ContentType
+from django.http import QueryDict
 from django.urls import reverse_lazy
 
-from cms.toolbar.utils import get_object_preview_url
+from ..datastructures import ReferenceRow
+from ..helpers import get_display_title, get_preview_url
 
 
 register = template.Library()
@@ -12,12 +14,29 @@ register = template.Library()
 def object_preview_url(obj):
     """
     Displays the preview url for obj.
+
+    Uses the url precomputed by ``helpers.attach_preview_urls`` if available.
     """
+    if isinstance(obj, ReferenceRow):
+        return obj.preview_url
     if isinstance(obj, (int, str)):
         raise template.TemplateSyntaxError(
             "object_preview_url tag requires a model object as argument"
         )
-    return get_object_preview_url(obj)
+    if hasattr(obj, "references_preview_url"):
+        return obj.references_preview_url
+    return get_preview_url(obj, {})
+
+
+@register.simple_tag()
+def object_title(obj):
+    """
+    Displays the title of obj. Compact rows are built from the registered
+    title field, model objects are displayed using ``str()``.
+    """
+    if isinstance(obj, ReferenceRow):
+        return get_display_title(obj.model, obj.title, obj.language)
+    return str(obj)
 
 
 @register.simple_tag()
@@ -25,6 +44,8 @@ def object_model(obj):
     """
     Displays the model name of the obj.
     """
+    if isinstance(obj, ReferenceRow):
+        return obj.model._meta.model_name
     if not hasattr(obj, "_meta"):
         raise template.TemplateSyntaxError(
             "object_model tag requires a model object as argument"
@@ -34,9 +55,27 @@ def object_model(obj):
 
 @register.simple_tag()
 def extra_column(obj, column):
+    if isinstance(obj, ReferenceRow):
+        return obj.get_column_value(column)
     return column.getter(obj)
 
 
+@register.simple_tag(takes_context=True)
+def references_querystring(context, **kwargs):
+    """
+    Returns the current query string updated with provided parameters.
+    Parameters set to None are removed.
+    """
+    request = getattr(context, "request", None) or context.get("request")
+    query = request.GET.copy() if request is not None else QueryDict(mutable=True)
+    for key, value in kwargs.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return "?" + query.urlencode()
+
+
 @register.simple_tag()
 def get_versioning_filer_references_url(file):
     """
@@ -1,8 +1,12 @@
 from cms.app_base import CMSAppConfig
 
-from .models import Child
+from .models import Child, GenericChild, ManyChild
 
 
 class CMSApp1Config(CMSAppConfig):
     djangocms_references_enabled = True
-    reference_fields = [(Child, "parent")]
+    reference_fields = [
+        (Child, "parent"),
+        (GenericChild, "content_object"),
+        (ManyChild, "parents"),
+    ]
@@ -1,3 +1,5 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
 
@@ -11,3 +13,16 @@ class Child(models.Model):
 
 class UnknownChild(models.Model):
     parent = models.ForeignKey(Parent, on_delete=models.CASCADE)
+
+
+class ManyChild(models.Model):
+    parents = models.ManyToManyField(Parent)
+
+
+class GenericChild(models.Model):
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+
+    class Meta:
+        indexes = [models.Index(fields=["content_type", "object_id"])]
@@ -1,10 +1,18 @@
+import re
+
 from cms.app_base import CMSAppConfig
 
 from djangocms_references.test_utils.polls.models import PollPlugin
 
-from .models import PollContent
+from .models import Poll, PollContent, PollTextPlugin
+
+
+def extract_polls(plugin):
+    poll_ids = re.findall(r'data-poll-id="(\d+)"', plugin.body)
+    return Poll.objects.filter(pk__in=poll_ids)
 
 
 class PollsCMSConfig(CMSAppConfig):
     djangocms_references_enabled = True
     reference_fields = [(PollContent, "poll"), (PollPlugin, "poll")]
+    reference_extractors = [(PollTextPlugin, extract_polls)]
@@ -2,7 +2,7 @@ from cms.plugin_base import CMSPluginBase
 from cms.plugin_pool import plugin_pool
 
 from .forms import PollPluginForm
-from .models import PollPlugin as Poll
+from .models import PollPlugin as Poll, PollTextPlugin as PollText
 
 
 _all__ = ["References"]
@@ -14,3 +14,10 @@ class PollPlugin(CMSPluginBase):
     model = Poll
     form = PollPluginForm
     render_plugin = False
+
+
+@plugin_pool.register_plugin
+class PollTextPlugin(CMSPluginBase):
+    name = "PollTextPlugin"
+    model = PollText
+    render_plugin = False
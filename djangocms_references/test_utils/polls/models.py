@@ -38,3 +38,7 @@ class PollPlugin(CMSPlugin):
         null=True,
         blank=True,
     )
+
+
+class PollTextPlugin(CMSPlugin):
+    body = models.TextField(blank=True)
@@ -1,7 +1,12 @@
 from django.contrib.admin.views.decorators import staff_member_required
 from django.urls import path
 
-from .views import ReferencesView
+from .views import (
+    OutgoingReferencesView,
+    ReferencesGroupView,
+    ReferencesJSONView,
+    ReferencesView,
+)
 
 
 app_name = "djangocms_references"
@@ -10,5 +15,20 @@ urlpatterns = [
         "references/<int:content_type_id>/<int:object_id>/",
         staff_member_required(ReferencesView.as_view()),
         name="references-index",
-    )
+    ),
+    path(
+        "references/<int:content_type_id>/<int:object_id>/group/<int:group_content_type_id>/",
+        staff_member_required(ReferencesGroupView.as_view()),
+        name="references-group",
+    ),
+    path(
+        "references/<int:content_type_id>/<int:object_id>/json/",
+        staff_member_required(ReferencesJSONView.as_view()),
+        name="references-json",
+    ),
+    path(
+        "references/<int:content_type_id>/<int:object_id>/outgoing/",
+        staff_member_required(OutgoingReferencesView.as_view()),
+        name="references-outgoing",
+    ),
 ]
@@ -1,17 +1,57 @@
+import hashlib
+import json
+
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import PermissionDenied
-from django.http import Http404
-from django.utils.translation import gettext_lazy as _
-from django.views.generic.base import TemplateView
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.http import quote_etag
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext_lazy as _
+from django.views.generic.base import TemplateView, View
 
 from djangocms_versioning.constants import VERSION_STATES
 
-from .helpers import get_all_reference_objects, get_extra_columns
+from .constants import SORT_OPTIONS
+from .helpers import (
+    apply_filters,
+    attach_reference_occurrences,
+    filter_by_content_type,
+    get_all_reference_objects,
+    get_extra_columns,
+    get_outgoing_references,
+    get_page_size,
+    get_reference_content_types,
+    get_reference_database,
+    get_reference_state_counts,
+    get_references_by_values,
+    get_references_for_display,
+    get_sorted_references,
+    get_streaming_chunk_size,
+    get_summary_if_above_threshold,
+    get_watermark,
+    is_progressive_loading_enabled,
+    is_streaming_enabled,
+    is_watermark_enabled,
+    iterate_references,
+)
 from .models import References
 
 
-class ReferencesView(TemplateView):
-    template_name = "djangocms_references/references.html"
+ROWS_MARKER = mark_safe("<!-- djangocms-references-rows -->")
+
+
+class ReferencesObjectMixin:
+    """Checks the show_references permission and retrieves
+    the object references are displayed for.
+    """
 
     def dispatch(self, *args, **kwargs):
         opts = References._meta
@@ -19,13 +59,32 @@ class ReferencesView(TemplateView):
             "{app_label}.show_references".format(app_label=opts.app_label)
         ):
             raise PermissionDenied
-        return super().dispatch(*args, **kwargs)
+        if not is_watermark_enabled() or self.request.method not in ("GET", "HEAD"):
+            return super().dispatch(*args, **kwargs)
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+        # Nothing affecting references changed since the response
+        # with the same ETag was sent, reference queries are skipped.
+        # The watermark is read once, so that a concurrent change can't
+        # label the response with a newer ETag than its content.
+        etag = self.get_watermark_etag()
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = super().dispatch(*args, **kwargs)
+            response["ETag"] = etag
+        return response
 
-        extra_columns = get_extra_columns()
+    def get_watermark_etag(self):
+        key = "\n".join(
+            (
+                get_watermark(),
+                self.request.get_full_path(),
+                get_language() or "",
+                get_reference_database(self.request) or "",
+            )
+        )
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
 
+    def get_object(self):
         try:
             content_type = ContentType.objects.get_for_id(
                 int(self.kwargs.get("content_type_id"))
@@ -36,27 +95,376 @@ class ReferencesView(TemplateView):
         model = content_type.model_class()
 
         try:
-            obj = content_type.get_object_for_this_type(
+            return content_type.get_object_for_this_type(
                 pk=int(self.kwargs["object_id"])
             )
         except model.DoesNotExist:
             raise Http404
 
+    def get_selected_state(self):
         selected_state = self.request.GET.get("state", 'all')
 
         if selected_state not in str(VERSION_STATES):
             selected_state = "all"
+        return selected_state
+
+    def get_selected_language(self):
+        return self.request.GET.get("language") or None
+
+    def get_selected_site(self):
+        """Returns the Site references are limited to, the current site
+        by default. Returns None when ``site=all`` is requested.
+        """
+        site_id = self.request.GET.get("site")
+        if site_id == "all":
+            return
+        if site_id:
+            try:
+                return Site.objects.get(pk=int(site_id))
+            except (ValueError, Site.DoesNotExist):
+                raise Http404
+        return get_current_site(self.request)
+
+    def apply_drill_down_filters(self, querysets):
+        """Applies content type filter used by links of the references
+        summary. Language is applied by get_all_reference_objects.
+        """
+        try:
+            content_type_id = int(self.request.GET.get("content_type", ""))
+        except ValueError:
+            pass
+        else:
+            querysets = filter_by_content_type(querysets, content_type_id)
+        return querysets
+
+
+class ReferencesView(ReferencesObjectMixin, TemplateView):
+    template_name = "djangocms_references/references.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        extra_columns = get_extra_columns()
+
+        obj = self.get_object()
+        model = obj.__class__
+        selected_state = self.get_selected_state()
+
+        # Plugins holding the references are only collected on request
+        occurrences = {} if self.request.GET.get("occurrences") else None
+        # Unfiltered references are used for state counts, state filter
+        # is applied afterwards
+        querysets = get_all_reference_objects(
+            obj,
+            using=get_reference_database(self.request),
+            language=self.get_selected_language(),
+            site=self.get_selected_site(),
+            occurrences=occurrences,
+        )
+        state_counts = get_reference_state_counts(querysets)
+        if selected_state != "all":
+            querysets = [apply_filters(qs, selected_state) for qs in querysets]
+        querysets = self.apply_drill_down_filters(querysets)
+
+        sort = self.request.GET.get("sort", "")
+        if sort.lstrip("-") not in dict(SORT_OPTIONS):
+            sort = ""
+        search = self.request.GET.get("q", "").strip()
+        summary = None
+        if sort or search or "page" in self.request.GET:
+            context.update(
+                self.get_sorted_context_data(
+                    querysets, sort or "title", search, extra_columns
+                )
+            )
+        elif not self.request.GET.get("full"):
+            summary = get_summary_if_above_threshold(querysets)
+        if summary is None and "querysets" not in context:
+            if is_progressive_loading_enabled():
+                # Only content types are listed, rows of each group
+                # are loaded from ReferencesGroupView when expanded
+                context["groups"] = self.get_groups(obj, querysets)
+            elif is_streaming_enabled():
+                # Objects are loaded while streaming the response
+                context["querysets"] = querysets
+                context["streaming"] = True
+            else:
+                context["querysets"] = get_references_for_display(
+                    querysets, extra_columns
+                )
 
-        querysets = get_all_reference_objects(obj, selected_state)
+        if (
+            occurrences is not None
+            and "querysets" in context
+            and not context.get("streaming")
+        ):
+            attach_reference_occurrences(
+                context["querysets"],
+                occurrences,
+                using=get_reference_database(self.request),
+            )
 
         context.update(
             {
                 "title": _("References of {object}").format(object=obj),
                 "opts": model._meta,
-                "querysets": querysets,
                 "selected_state": selected_state,
+                "selected_language": self.get_selected_language(),
+                "languages": settings.LANGUAGES,
+                "all_sites": self.request.GET.get("site") == "all",
+                "show_occurrences": occurrences is not None,
+                "sort": sort,
+                "sort_options": [
+                    # (label, sort value of the link, current direction)
+                    (
+                        label,
+                        "-" + key if sort == key else key,
+                        {key: "asc", "-" + key: "desc"}.get(sort, ""),
+                    )
+                    for key, label in SORT_OPTIONS
+                ],
+                "search": search,
+                "summary": summary,
+                "base_url": "",
+                "outgoing_url": reverse(
+                    "djangocms_references:references-outgoing", kwargs=self.kwargs
+                ),
                 "extra_columns": extra_columns,
-                "version_states": VERSION_STATES
+                "version_states": VERSION_STATES,
+                "version_state_counts": [
+                    (key, label, state_counts.get(key, 0))
+                    for key, label in VERSION_STATES
+                ],
             }
         )
         return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if context.get("streaming"):
+            return StreamingHttpResponse(
+                self.stream_content(context),
+                content_type=response_kwargs.get("content_type"),
+            )
+        return super().render_to_response(context, **response_kwargs)
+
+    def stream_content(self, context):
+        """Yields the page without table rows first, followed by rows
+        rendered in chunks as the querysets are iterated.
+        """
+        page = render_to_string(
+            self.get_template_names(),
+            dict(context, rows_marker=ROWS_MARKER),
+            request=self.request,
+        )
+        head, tail = page.split(ROWS_MARKER, 1)
+        yield head
+        has_rows = False
+        for objects in iterate_references(
+            context["querysets"], get_streaming_chunk_size()
+        ):
+            has_rows = True
+            yield render_to_string(
+                "djangocms_references/references_rows.html",
+                {"objects": objects, "extra_columns": context["extra_columns"]},
+            )
+        if not has_rows:
+            yield render_to_string(
+                "djangocms_references/references_empty_row.html",
+                {"extra_columns": context["extra_columns"]},
+            )
+        yield tail
+
+    def get_groups(self, obj, querysets):
+        """Returns a list of (content type, url) pairs, url returning
+        table rows of references of that content type.
+        """
+        querystring = self.request.GET.urlencode()
+        groups = []
+        for content_type in get_reference_content_types(querysets):
+            url = reverse(
+                "djangocms_references:references-group",
+                kwargs={
+                    "content_type_id": self.kwargs["content_type_id"],
+                    "object_id": self.kwargs["object_id"],
+                    "group_content_type_id": content_type.pk,
+                },
+            )
+            if querystring:
+                url = "{}?{}".format(url, querystring)
+            groups.append((content_type, url))
+        return groups
+
+    def get_sorted_context_data(self, querysets, sort, search, extra_columns):
+        """Sorts and searches references in the database, only loading
+        objects displayed on the current page.
+        """
+        references = get_sorted_references(querysets, sort, search)
+        paginator = Paginator(references, get_page_size())
+        page = paginator.get_page(self.request.GET.get("page"))
+        objects = get_references_by_values(querysets, page.object_list, extra_columns)
+        return {
+            "querysets": [objects] if objects else [],
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+        }
+
+
+class ReferencesGroupView(ReferencesObjectMixin, TemplateView):
+    """Renders table rows of references of a single content type,
+    used by the references view when progressive loading is enabled.
+    """
+    template_name = "djangocms_references/references_group.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        obj = self.get_object()
+        try:
+            group_model = ContentType.objects.get_for_id(
+                self.kwargs["group_content_type_id"]
+            ).model_class()
+        except ContentType.DoesNotExist:
+            raise Http404
+        if group_model is None:
+            raise Http404
+
+        extra_columns = get_extra_columns()
+        querysets = get_all_reference_objects(
+            obj,
+            state_selected=self.get_selected_state(),
+            using=get_reference_database(self.request),
+            model=group_model,
+            language=self.get_selected_language(),
+            site=self.get_selected_site(),
+        )
+        querysets = self.apply_drill_down_filters(querysets)
+        context.update(
+            {
+                "querysets": get_references_for_display(querysets, extra_columns),
+                "extra_columns": extra_columns,
+            }
+        )
+        return context
+
+
+class OutgoingReferencesView(ReferencesObjectMixin, TemplateView):
+    """Lists objects the object depends on, i.e. objects it references
+    directly or through plugins in its placeholders.
+    """
+    template_name = "djangocms_references/references_outgoing.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        obj = self.get_object()
+        extra_columns = get_extra_columns()
+        querysets = get_outgoing_references(
+            obj,
+            using=get_reference_database(self.request),
+            language=self.get_selected_language(),
+        )
+        context.update(
+            {
+                "title": _("Dependencies of {object}").format(object=obj),
+                "opts": obj._meta,
+                "querysets": get_references_for_display(querysets, extra_columns),
+                "extra_columns": extra_columns,
+                "references_url": reverse(
+                    "djangocms_references:references-index", kwargs=self.kwargs
+                ),
+            }
+        )
+        return context
+
+
+class ReferencesJSONEncoder(DjangoJSONEncoder):
+    """Encodes values of extra columns that are not JSON serializable
+    (e.g. model instances) as strings.
+    """
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+class ReferencesJSONView(ReferencesObjectMixin, View):
+    """Returns references of an object as JSON: a page of compact rows
+    sorted in the database, together with the number of references
+    of each content type.
+
+    Supports the ``state``, ``sort``, ``q``, ``page``, ``content_type``
+    and ``language`` query parameters of the references view. Responses
+    carry an ETag, matching ``If-None-Match`` requests get a 304 response.
+    """
+
+    def get(self, request, *args, **kwargs):
+        obj = self.get_object()
+        extra_columns = get_extra_columns()
+        selected_state = self.get_selected_state()
+
+        querysets = get_all_reference_objects(
+            obj,
+            state_selected=selected_state,
+            using=get_reference_database(request),
+            language=self.get_selected_language(),
+            site=self.get_selected_site(),
+        )
+        querysets = self.apply_drill_down_filters(querysets)
+
+        sort = request.GET.get("sort", "title")
+        if sort.lstrip("-") not in dict(SORT_OPTIONS):
+            sort = "title"
+        search = request.GET.get("q", "").strip()
+
+        references = get_sorted_references(querysets, sort, search)
+        paginator = Paginator(references, get_page_size())
+        page = paginator.get_page(request.GET.get("page"))
+        rows = get_references_by_values(
+            querysets, page.object_list, extra_columns, compact=True
+        )
+
+        data = {
+            "count": paginator.count,
+            "num_pages": paginator.num_pages,
+            "page": page.number,
+            "content_types": [
+                self.get_content_type_data(queryset) for queryset in querysets
+            ],
+            "results": [self.get_row_data(row) for row in rows],
+        }
+        response = HttpResponse(
+            json.dumps(data, cls=ReferencesJSONEncoder),
+            content_type="application/json",
+        )
+        set_response_etag(response)
+        return get_conditional_response(
+            request, etag=response["ETag"], response=response
+        )
+
+    def get_content_type_data(self, queryset):
+        content_type = ContentType.objects.db_manager(queryset.db).get_for_model(
+            queryset.model
+        )
+        return {
+            "id": content_type.pk,
+            "model": queryset.model._meta.label_lower,
+            "name": content_type.name,
+            "count": queryset.count(),
+        }
+
+    def get_row_data(self, row):
+        return {
+            "content_type": ContentType.objects.get_for_model(row.model).pk,
+            "model": row.model._meta.label_lower,
+            "id": row.pk,
+            "title": row.title,
+            "language": row.language,
+            "url": row.preview_url,
+            "columns": {
+                str(column.verbose_name): value
+                for column, value in zip(row.columns, row.values)
+            },
+        }
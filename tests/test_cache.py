@@ -0,0 +1,161 @@
+from unittest.mock import patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.http import HttpRequest
+from django.test import TestCase, override_settings
+
+from cms.api import add_plugin
+from cms.cache.page import _page_cache_key
+from cms.models import PageUrl
+
+from djangocms_alias.models import Alias, AliasContent, Category
+
+from djangocms_references.cache import (
+    get_page_cache_keys,
+    get_referencing_pages,
+    invalidate_page_cache,
+)
+from djangocms_references.handlers import invalidate_page_cache_handler
+from djangocms_references.test_utils.factories import (
+    PageContentFactory,
+    PlaceholderFactory,
+)
+
+
+class ReferencingPagesTestCase(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Category")
+        inner_alias = Alias.objects.create(category=category, position=0)
+        self.inner_content = AliasContent.objects.create(
+            alias=inner_alias, name="Inner", language="en"
+        )
+        outer_alias = Alias.objects.create(category=category, position=1)
+        self.outer_content = AliasContent.objects.create(
+            alias=outer_alias, name="Outer", language="en"
+        )
+        self.add_alias_plugin(self.outer_content, inner_alias)
+        self.page_content = PageContentFactory(language="en")
+        self.add_alias_plugin(self.page_content, outer_alias)
+
+    def add_alias_plugin(self, source, alias):
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(source),
+            object_id=source.pk,
+        )
+        add_plugin(placeholder, "Alias", "en", template="default", alias=alias)
+
+    def test_direct_references(self):
+        self.assertEqual(
+            get_referencing_pages(self.outer_content),
+            {(self.page_content.page_id, "en")},
+        )
+        self.assertEqual(get_referencing_pages(self.inner_content), set())
+
+    def test_transitive_references(self):
+        self.assertEqual(
+            get_referencing_pages(self.inner_content, transitive=True),
+            {(self.page_content.page_id, "en")},
+        )
+
+    def test_invalidate_page_cache(self):
+        with patch(
+            "djangocms_references.cache.get_page_cache_keys",
+            return_value=["page-key"],
+        ) as get_page_cache_keys, patch(
+            "djangocms_references.cache.cache.delete_many"
+        ) as delete_many:
+            keys = invalidate_page_cache(self.outer_content)
+
+        get_page_cache_keys.assert_called_once_with(
+            {(self.page_content.page_id, "en")}, None
+        )
+        self.assertEqual(keys, ["page-key"])
+        delete_many.assert_called_once()
+        self.assertEqual(delete_many.call_args[0][0], ["page-key"])
+
+
+class PageCacheKeysTestCase(TestCase):
+    def create_page(self, path, language="en"):
+        page_content = PageContentFactory(language=language)
+        PageUrl.objects.create(
+            page=page_content.page, language=language, path=path, slug=path
+        )
+        return page_content
+
+    def test_key_matches_cms_page_cache_key(self):
+        page_content = self.create_page("foo")
+        request = HttpRequest()
+        request.path = request.path_info = page_content.page.get_absolute_url("en")
+
+        keys = get_page_cache_keys({(page_content.page_id, "en")})
+
+        self.assertEqual(keys, [_page_cache_key(request)])
+
+    def test_urls_are_fetched_in_one_query(self):
+        pages = {
+            (self.create_page(path).page_id, "en") for path in ("foo", "bar", "baz")
+        }
+
+        with self.assertNumQueries(1):
+            keys = get_page_cache_keys(pages)
+
+        self.assertEqual(len(keys), 3)
+
+    def test_keys_of_other_languages_and_pages_without_url(self):
+        page_content = self.create_page("foo", language="fr")
+        other_page_content = PageContentFactory(language="en")
+
+        keys = get_page_cache_keys(
+            {(page_content.page_id, "en"), (other_page_content.page_id, "en")}
+        )
+
+        self.assertEqual(keys, [])
+
+    def test_key_uses_site_of_page(self):
+        site = Site.objects.create(domain="other.example.com", name="Other")
+        page_content = self.create_page("foo")
+        page_content.page.node.site = site
+        page_content.page.node.save()
+
+        [key] = get_page_cache_keys({(page_content.page_id, "en")})
+
+        self.assertIn(":{}:".format(site.pk), key)
+
+    @override_settings(
+        DJANGOCMS_REFERENCES_PAGE_CACHE_TIMEZONES=["Europe/Paris", "America/New_York"]
+    )
+    def test_keys_per_timezone(self):
+        page_content = self.create_page("foo")
+
+        keys = get_page_cache_keys({(page_content.page_id, "en")})
+
+        self.assertEqual(
+            [key.rsplit(".", 1)[1] for key in keys],
+            ["America/New_York", "Europe/Paris"],
+        )
+
+
+class InvalidatePageCacheHandlerTestCase(TestCase):
+    def test_disabled_by_default(self):
+        with patch("djangocms_references.cache.invalidate_page_cache") as invalidate:
+            invalidate_page_cache_handler(
+                sender=AliasContent, operation="operation_publish", obj=None
+            )
+
+        invalidate.assert_not_called()
+
+    @override_settings(
+        DJANGOCMS_REFERENCES_INVALIDATE_PAGE_CACHE=True,
+        DJANGOCMS_REFERENCES_INVALIDATE_PAGE_CACHE_TRANSITIVE=True,
+    )
+    def test_invalidates_on_publish(self):
+        from djangocms_versioning.constants import OPERATION_PUBLISH
+
+        version = type("Version", (), {"content": object()})()
+        with patch("djangocms_references.cache.invalidate_page_cache") as invalidate:
+            invalidate_page_cache_handler(
+                sender=AliasContent, operation=OPERATION_PUBLISH, obj=version
+            )
+
+        invalidate.assert_called_once_with(version.content, transitive=True)
@@ -7,15 +7,19 @@ from django.test import RequestFactory, TestCase, override_settings
 
 from cms import app_registration
 from cms.models import PageContent
-from cms.toolbar.utils import get_object_preview_url
 from cms.utils.setup import configure_cms_apps
 
 from djangocms_alias.models import Alias
 from djangocms_snippet.models import SnippetGrouper
 
 from djangocms_references import cms_config
+from djangocms_references.datastructures import GenericRelationLookup
 from djangocms_references.test_utils import factories
-from djangocms_references.test_utils.app_1.models import Child, Parent
+from djangocms_references.test_utils.app_1.models import (
+    Child,
+    GenericChild,
+    Parent,
+)
 from djangocms_references.test_utils.polls.models import Poll, PollContent
 
 
@@ -98,6 +102,85 @@ class CMSConfigTestCase(TestCase):
         self.assertTrue(Child in reference_models[Parent])
         self.assertTrue("parent" in reference_models[Parent][Child])
 
+    def test_generic_foreign_key_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_fields=[(GenericChild, "content_object")],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        extensions.configure_app(mocked_cms_config)
+
+        self.assertEqual(
+            extensions.reference_generic_models,
+            {GenericChild: {GenericRelationLookup("content_type", "object_id")}},
+        )
+        self.assertEqual(dict(extensions.reference_models), {})
+
+    def test_list_title_fields_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_list_title_fields=[(Poll, "name")],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        extensions.configure_app(mocked_cms_config)
+
+        self.assertEqual(extensions.list_title_fields, {Poll: "name"})
+
+    def test_invalid_list_title_fields_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_list_title_fields=[Poll],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        with self.assertRaises(ImproperlyConfigured):
+            extensions.configure_app(mocked_cms_config)
+
+    def test_site_fields_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_site_fields=[(PageContent, "page__node__site")],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        extensions.configure_app(mocked_cms_config)
+
+        self.assertEqual(extensions.site_fields, {PageContent: "page__node__site"})
+
+    def test_invalid_site_fields_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_site_fields=[PageContent],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        with self.assertRaises(ImproperlyConfigured):
+            extensions.configure_app(mocked_cms_config)
+
+    def test_invalid_reference_extractors_cms_config_parameter(self):
+        extensions = cms_config.ReferencesCMSExtension()
+        mocked_cms_config = Mock(
+            spec=[],
+            djangocms_references_enabled=True,
+            reference_extractors=[(Poll, lambda plugin: [])],
+            app_config=Mock(label="blah_cms_config"),
+        )
+
+        with self.assertRaises(ImproperlyConfigured):
+            extensions.configure_app(mocked_cms_config)
+
 
 class ModifierTestCase(TestCase):
     def test_versioned(self):
@@ -110,7 +193,26 @@ class ModifierTestCase(TestCase):
             result = cms_config.version_queryset_modifier(queryset)
         mock.assert_called_once_with(queryset.model)
         self.assertNotEqual(result, queryset)
-        self.assertIn("versions", result._prefetch_related_lookups)
+        self.assertEqual(
+            [lookup.prefetch_to for lookup in result._prefetch_related_lookups],
+            ["versions"],
+        )
+        # Authors are joined instead of being prefetched separately
+        self.assertEqual(
+            result._prefetch_related_lookups[0].queryset.query.select_related,
+            {"created_by": {}},
+        )
+
+    def test_versioned_queries(self):
+        version = factories.PageVersionFactory()
+        queryset = PageContent._base_manager.filter(pk=version.content.pk)
+
+        result = cms_config.version_queryset_modifier(queryset)
+
+        # One query for contents, one for versions with their authors
+        with self.assertNumQueries(2):
+            content = result.get()
+            self.assertEqual(content.versions.all()[0].created_by, version.created_by)
 
     def test_not_versioned(self):
         queryset = PageContent.objects.all()
@@ -155,17 +257,19 @@ class UnpublishDependenciesTestCase(TestCase):
         html = cms_config.unpublish_dependencies(request, version)
 
         mocked_references.assert_called_once_with(
-            version.content, state_selected=False
+            version.content, state_selected=False, using=None
         )
         # NOTE: This is not an extensive test of the html, but testing for
         # exact html will likely be a pain later (making this test
         # break easily and make it difficult to maintain)
-        self.assertIn(get_object_preview_url(polls[0]), html)
-        self.assertIn(get_object_preview_url(polls[1]), html)
-        self.assertIn(get_object_preview_url(parent), html)
+        # Polls and parents have no preview url, as they are not
+        # registered as toolbar enabled models
+        self.assertIn("<td>{}</td>".format(polls[0]), html)
+        self.assertIn("<td>{}</td>".format(polls[1]), html)
+        self.assertIn("<td>{}</td>".format(parent), html)
         # we passed an empty Child queryset so this should not have made
         # it into the html
-        self.assertNotIn(get_object_preview_url(child), html)
+        self.assertNotIn("<td>{}</td>".format(child), html)
 
     @patch("djangocms_references.cms_config.get_all_reference_objects")
     def test_unpublish_dependencies_when_no_dependencies_found(self, mocked_references):
@@ -177,10 +281,42 @@ class UnpublishDependenciesTestCase(TestCase):
         html = cms_config.unpublish_dependencies(request, version)
 
         mocked_references.assert_called_once_with(
-            version.content, state_selected=False
+            version.content, state_selected=False, using=None
         )
         self.assertIn("There are no related objects", html)
 
+    @override_settings(DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD=2)
+    @patch("djangocms_references.cms_config.get_all_reference_objects")
+    def test_unpublish_dependencies_summary(self, mocked_references):
+        request = RequestFactory().get("/")
+        version = factories.PageVersionFactory()
+        polls = factories.PollContentFactory.create_batch(3)
+        mocked_references.return_value = [PollContent.objects.all()]
+
+        html = cms_config.unpublish_dependencies(request, version)
+
+        self.assertIn("This object has 3 references", html)
+        self.assertNotIn("<td>{}</td>".format(polls[0]), html)
+
+
+class BulkUnpublishDependenciesTestCase(TestCase):
+    @patch("djangocms_references.cms_config.get_all_reference_objects_for_many")
+    def test_bulk_unpublish_dependencies(self, mocked_references):
+        request = RequestFactory().get("/")
+        versions = factories.PageVersionFactory.create_batch(2)
+        polls = factories.PollContentFactory.create_batch(2)
+        mocked_references.return_value = [PollContent.objects.all()]
+
+        html = cms_config.bulk_unpublish_dependencies(request, versions)
+
+        mocked_references.assert_called_once_with(
+            [version.content for version in versions],
+            state_selected=False,
+            using=None,
+        )
+        self.assertIn("<td>{}</td>".format(polls[0]), html)
+        self.assertIn("<td>{}</td>".format(polls[1]), html)
+
 
 class VersioningSettingTestCase(TestCase):
     def setUp(self):
@@ -0,0 +1,56 @@
+import json
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from djangocms_references.test_utils.app_1.models import Child, Parent
+
+
+class FindUnreferencedCommandTestCase(TestCase):
+    def test_find_unreferenced(self):
+        parents = [Parent.objects.create() for _ in range(2)]
+        Child.objects.create(parent=parents[0])
+        out = StringIO()
+
+        call_command("find_unreferenced", models=["app_1.parent"], stdout=out)
+
+        self.assertEqual(out.getvalue(), "app_1.parent\t{}\n".format(parents[1].pk))
+
+    def test_objects_are_not_loaded(self):
+        Parent.objects.create()
+
+        # A single query listing pks, without rendering objects
+        with self.assertNumQueries(1):
+            call_command(
+                "find_unreferenced", models=["app_1.parent"], stdout=StringIO()
+            )
+
+    def test_unknown_model(self):
+        with self.assertRaises(CommandError):
+            call_command("find_unreferenced", models=["app_1.unknownchild"])
+
+
+class ExportReferenceGraphCommandTestCase(TestCase):
+    def test_export_reference_graph(self):
+        parent = Parent.objects.create()
+        child = Child.objects.create(parent=parent)
+        edge = {
+            "source": "app_1.child:{}".format(child.pk),
+            "target": "app_1.parent:{}".format(parent.pk),
+            "relation": "app_1.child.parent",
+        }
+
+        for output_format, expected in (
+            ("jsonl", json.dumps(edge)),
+            ("dot", '"{source}" -> "{target}" [label="{relation}"];'.format(**edge)),
+            (
+                "graphml",
+                '<edge source="{source}" target="{target}">'
+                '<data key="relation">{relation}</data></edge>'.format(**edge),
+            ),
+        ):
+            with self.subTest(output_format):
+                out = StringIO()
+                call_command("export_reference_graph", format=output_format, stdout=out)
+                self.assertIn(expected, out.getvalue())
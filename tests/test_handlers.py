@@ -0,0 +1,115 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from cms.api import add_plugin
+from cms.models import Placeholder
+
+from djangocms_alias.models import Alias, AliasContent, AliasPlugin
+
+from djangocms_references.handlers import get_watched_models, is_watched_model
+from djangocms_references.helpers import (
+    get_all_reference_objects,
+    get_watermark,
+)
+from djangocms_references.models import ExtractedReference
+from djangocms_references.test_utils.factories import (
+    PageContentFactory,
+    PlaceholderFactory,
+    PollFactory,
+)
+
+
+class WatchedModelsTestCase(TestCase):
+    def test_watched_models(self):
+        models = get_watched_models()
+
+        self.assertIn(Placeholder, models)
+        self.assertIn(Alias, models)
+        # Contents of versioned referenced models are watched too
+        self.assertIn(AliasContent, models)
+
+    def test_plugins_are_watched(self):
+        self.assertTrue(is_watched_model(AliasPlugin))
+
+
+class UpdateWatermarkTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(DJANGOCMS_REFERENCES_WATERMARK=True)
+    def test_save_updates_watermark(self):
+        watermark = get_watermark()
+
+        PollFactory()
+
+        self.assertNotEqual(get_watermark(), watermark)
+
+    @override_settings(DJANGOCMS_REFERENCES_WATERMARK=True)
+    def test_placeholder_without_source_does_not_update_watermark(self):
+        watermark = get_watermark()
+
+        Placeholder.objects.create(slot="clipboard")
+
+        self.assertEqual(get_watermark(), watermark)
+
+    def test_watermark_not_updated_when_disabled(self):
+        watermark = get_watermark()
+
+        PollFactory()
+
+        self.assertEqual(get_watermark(), watermark)
+
+    def test_watermark_regenerated_when_evicted(self):
+        watermark = get_watermark()
+
+        cache.clear()
+
+        self.assertNotEqual(get_watermark(), watermark)
+
+
+class UpdateExtractedReferencesTestCase(TestCase):
+    def setUp(self):
+        self.page_content = PageContentFactory(language="en")
+        self.placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(self.page_content),
+            object_id=self.page_content.id,
+        )
+        self.poll = PollFactory()
+
+    def test_references_recorded_on_save(self):
+        plugin = add_plugin(
+            self.placeholder,
+            "PollTextPlugin",
+            "en",
+            body='<span data-poll-id="{}"></span>'.format(self.poll.pk),
+        )
+
+        self.assertQuerySetEqual(
+            ExtractedReference.objects.values_list(
+                "plugin", "content_type", "object_id"
+            ),
+            [(plugin.pk, ContentType.objects.get_for_model(self.poll).pk, self.poll.pk)],
+            transform=tuple,
+        )
+        querysets = get_all_reference_objects(self.poll)
+        self.assertEqual(len(querysets), 1)
+        self.assertQuerySetEqual(querysets[0], [self.page_content])
+
+    def test_references_replaced_on_save(self):
+        other_poll = PollFactory()
+        plugin = add_plugin(
+            self.placeholder,
+            "PollTextPlugin",
+            "en",
+            body='<span data-poll-id="{}"></span>'.format(self.poll.pk),
+        )
+
+        plugin.body = '<span data-poll-id="{}"></span>'.format(other_poll.pk)
+        plugin.save()
+
+        self.assertEqual(get_all_reference_objects(self.poll), [])
+        self.assertQuerySetEqual(
+            ExtractedReference.objects.values_list("object_id", flat=True),
+            [other_poll.pk],
+        )
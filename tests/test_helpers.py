@@ -1,28 +1,64 @@
+import time
+from collections import defaultdict
 from unittest.mock import Mock, patch
 
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.sites.models import Site
+from django.db import connection
 from django.db.models import Q
-from django.test import TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from cms.api import add_plugin
+from cms.toolbar.utils import get_object_preview_url
+
+from djangocms_versioning.constants import DRAFT, PUBLISHED
 
 from djangocms_references import helpers
+from djangocms_references.cms_config import version_queryset_modifier
+from djangocms_references.datastructures import (
+    ExtraColumn,
+    GenericRelationLookup,
+    ReferenceEdge,
+    ReferenceOccurrence,
+    ReferenceRow,
+    ThroughTableLookup,
+)
 from djangocms_references.helpers import (
     _get_reference_models,
+    attach_preview_urls,
+    attach_reference_occurrences,
     combine_querysets_of_same_models,
     get_all_reference_objects,
+    get_all_reference_objects_for_many,
+    get_compact_rows,
     get_extension,
     get_filters,
     get_lookup,
+    get_outgoing_references,
+    get_preview_url,
+    get_reference_database,
     get_reference_models,
     get_reference_objects_from_plugins,
     get_reference_plugins,
+    get_reference_target_models,
+    get_references_by_values,
+    get_references_for_display,
+    get_sorted_references,
+    get_unreferenced_objects,
     get_versionable_for_content,
+    has_references,
+    iterate_reference_edges,
+    iterate_references,
+    version_annotation,
     version_attr,
 )
+from djangocms_references.middleware import LAST_WRITE_SESSION_KEY
 from djangocms_references.test_utils.app_1.models import (
     Child,
+    GenericChild,
+    ManyChild,
     Parent,
     UnknownChild,
 )
@@ -30,8 +66,10 @@ from djangocms_references.test_utils.factories import (
     PageContentFactory,
     PageVersionFactory,
     PlaceholderFactory,
+    PollContentFactory,
     PollFactory,
 )
+from djangocms_references.test_utils.polls.models import Poll, PollContent
 
 
 class GetVersionableTestCase(TestCase):
@@ -40,6 +78,46 @@ class GetVersionableTestCase(TestCase):
             self.assertIsNone(get_versionable_for_content("foo"))
 
 
+class GetReferenceDatabaseTestCase(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.session = {}
+
+    def test_setting_not_defined(self):
+        self.assertIsNone(get_reference_database(self.request))
+
+    @override_settings(DJANGOCMS_REFERENCES_DATABASE="replica")
+    def test_setting_defined(self):
+        self.assertEqual(get_reference_database(), "replica")
+        self.assertEqual(get_reference_database(self.request), "replica")
+
+    @override_settings(DJANGOCMS_REFERENCES_DATABASE="replica")
+    def test_recent_write_uses_default_database(self):
+        self.request.session[LAST_WRITE_SESSION_KEY] = time.time()
+
+        self.assertEqual(get_reference_database(self.request), "default")
+
+    @override_settings(
+        DJANGOCMS_REFERENCES_DATABASE="replica",
+        DJANGOCMS_REFERENCES_READ_AFTER_WRITE_TIMEOUT=5,
+    )
+    def test_old_write_uses_replica(self):
+        self.request.session[LAST_WRITE_SESSION_KEY] = time.time() - 10
+
+        self.assertEqual(get_reference_database(self.request), "replica")
+
+    @override_settings(DJANGOCMS_REFERENCES_DATABASE="default")
+    def test_reference_querysets_use_database(self):
+        parent = Parent.objects.create()
+        Child.objects.create(parent=parent)
+
+        querysets = get_all_reference_objects(
+            parent, using=get_reference_database(self.request)
+        )
+
+        self.assertEqual([qs.db for qs in querysets], ["default"])
+
+
 class GetLookupTestCase(TestCase):
     def test_get_lookup_non_versioned(self):
         self.assertEqual(get_lookup("foo", None), "foo")
@@ -89,7 +167,9 @@ class GetReferenceModelsTestCase(TestCase):
             helpers, "_get_reference_models", return_value=["1", "2"]
         ) as inner:
             self.assertEqual(list(get_reference_models("foo")), ["1", "2"])
-            inner.assert_called_once_with("foo", extension.reference_models)
+            inner.assert_called_once_with(
+                "foo", extension.reference_models, extension.reference_generic_models
+            )
 
     def test_get_reference_plugins(self):
         extension = Mock()
@@ -99,7 +179,9 @@ class GetReferenceModelsTestCase(TestCase):
             helpers, "_get_reference_models", return_value=["1", "2"]
         ) as inner:
             self.assertEqual(list(get_reference_plugins("foo")), ["1", "2"])
-            inner.assert_called_once_with("foo", extension.reference_plugins)
+            inner.assert_called_once_with(
+                "foo", extension.reference_plugins, extension.reference_generic_plugins
+            )
 
     def test__get_reference_models(self):
         self.assertEqual(
@@ -132,6 +214,40 @@ class GetReferenceModelsTestCase(TestCase):
                 [(Child, ["parent__contentmodel", "foo__contentmodel"])],
             )
 
+    def test__get_reference_models_generic(self):
+        lookup = GenericRelationLookup("content_type", "object_id")
+        self.assertEqual(
+            list(
+                _get_reference_models(
+                    Parent,
+                    {Parent: {Child: ["parent"]}},
+                    {Child: {lookup}, GenericChild: {lookup}},
+                )
+            ),
+            [(Child, ["parent", lookup]), (GenericChild, [lookup])],
+        )
+
+    def test__get_reference_models_unregistered_model(self):
+        models = defaultdict(dict)
+
+        self.assertEqual(list(_get_reference_models(Parent, models)), [])
+        self.assertEqual(models, {})
+
+    def test__get_reference_models_many_to_many(self):
+        self.assertEqual(
+            list(_get_reference_models(Parent, {Parent: {ManyChild: ["parents"]}})),
+            [
+                (
+                    ManyChild,
+                    [
+                        ThroughTableLookup(
+                            ManyChild.parents.through, "manychild", "parent"
+                        )
+                    ],
+                )
+            ],
+        )
+
 
 class GetFiltersTestCase(TestCase):
     def test_get_filters_empty(self):
@@ -145,6 +261,18 @@ class GetFiltersTestCase(TestCase):
             get_filters("foo", ["bar", "baz"]), Q(bar="foo") | Q(baz="foo")
         )
 
+    def test_get_filters_generic(self):
+        parent = Parent.objects.create()
+        lookup = GenericRelationLookup("content_type", "object_id")
+
+        self.assertEqual(
+            get_filters(parent, [lookup]),
+            Q(
+                content_type=ContentType.objects.get_for_model(Parent),
+                object_id=parent.pk,
+            ),
+        )
+
 
 class GetReferenceObjectsTestCase(TestCase):
     def test_get_all_reference_objects(self):
@@ -160,6 +288,29 @@ class GetReferenceObjectsTestCase(TestCase):
         self.assertIn(child2, querysets[0])
         self.assertNotIn(child3, querysets[0])
 
+    def test_get_all_reference_objects_generic(self):
+        parent = Parent.objects.create()
+        generic_child = GenericChild.objects.create(content_object=parent)
+        GenericChild.objects.create(content_object=Parent.objects.create())
+
+        querysets = get_all_reference_objects(parent)
+
+        querysets_by_model = {qs.model: qs for qs in querysets}
+        self.assertQuerySetEqual(querysets_by_model[GenericChild], [generic_child])
+
+    def test_get_all_reference_objects_many_to_many(self):
+        parent = Parent.objects.create()
+        other_parent = Parent.objects.create()
+        many_child = ManyChild.objects.create()
+        many_child.parents.add(parent, other_parent)
+        ManyChild.objects.create().parents.add(other_parent)
+
+        querysets = get_all_reference_objects(parent)
+
+        querysets_by_model = {qs.model: qs for qs in querysets}
+        # Objects are not duplicated by joins
+        self.assertQuerySetEqual(querysets_by_model[ManyChild], [many_child])
+
     def test_get_reference_objects_from_plugins(self):
         page_content = PageContentFactory(title="test", language="en")
         placeholder = PlaceholderFactory(
@@ -173,6 +324,342 @@ class GetReferenceObjectsTestCase(TestCase):
         self.assertEqual(len(querysets), 1)
         self.assertIn(page_content, querysets[0])
 
+    def test_get_all_reference_objects_of_model(self):
+        poll = PollFactory()
+        poll_content = PollContentFactory(poll=poll)
+        page_content = PageContentFactory(title="test", language="en")
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(page_content),
+            object_id=page_content.id,
+        )
+        add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+
+        page_querysets = get_all_reference_objects(poll, model=page_content.__class__)
+        poll_querysets = get_all_reference_objects(poll, model=PollContent)
+
+        self.assertEqual(len(page_querysets), 1)
+        self.assertQuerySetEqual(page_querysets[0], [page_content])
+        self.assertEqual(len(poll_querysets), 1)
+        self.assertQuerySetEqual(poll_querysets[0], [poll_content])
+
+    def test_get_all_reference_objects_of_language(self):
+        poll = PollFactory()
+        en_poll_content = PollContentFactory(poll=poll, language="en")
+        PollContentFactory(poll=poll, language="de")
+        en_page_content = PageContentFactory(title="test", language="en")
+        de_page_content = PageContentFactory(title="test", language="de")
+        for page_content in (en_page_content, de_page_content):
+            placeholder = PlaceholderFactory(
+                content_type=ContentType.objects.get_for_model(page_content),
+                object_id=page_content.id,
+            )
+            add_plugin(
+                placeholder, "PollPlugin", page_content.language, poll=poll, template=0
+            )
+
+        querysets = get_all_reference_objects(poll, language="en")
+
+        self.assertCountEqual(
+            [obj for qs in querysets for obj in qs],
+            [en_poll_content, en_page_content],
+        )
+
+    def test_get_all_reference_objects_of_site(self):
+        site = Site.objects.get_current()
+        other_site = Site.objects.create(domain="other.example.com", name="other")
+        poll = PollFactory()
+        page_contents = [
+            PageContentFactory(language="en", page__node__site=site),
+            PageContentFactory(language="en", page__node__site=other_site),
+        ]
+        for page_content in page_contents:
+            placeholder = PlaceholderFactory(
+                content_type=ContentType.objects.get_for_model(page_content),
+                object_id=page_content.id,
+            )
+            add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+
+        querysets = get_all_reference_objects(poll, site=site)
+        all_querysets = get_all_reference_objects(poll)
+
+        self.assertEqual(len(querysets), 1)
+        self.assertQuerySetEqual(querysets[0], [page_contents[0]])
+        self.assertCountEqual(all_querysets[0], page_contents)
+
+    def test_get_all_reference_objects_from_static_placeholders(self):
+        from cms.models import StaticPlaceholder
+
+        poll = PollFactory()
+        static_placeholder = StaticPlaceholder.objects.create(
+            name="footer",
+            code="footer",
+            draft=PlaceholderFactory(slot="footer"),
+            public=PlaceholderFactory(slot="footer"),
+        )
+        add_plugin(static_placeholder.draft, "PollPlugin", "en", poll=poll, template=0)
+        page_content = PageContentFactory(language="en")
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(page_content),
+            object_id=page_content.id,
+        )
+        add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+
+        querysets = get_all_reference_objects(poll)
+
+        self.assertCountEqual(
+            [obj for qs in querysets for obj in qs],
+            [static_placeholder, page_content],
+        )
+
+
+class GetAllReferenceObjectsForManyTestCase(TestCase):
+    def _evaluate(self, contents):
+        return {
+            qs.model: list(qs)
+            for qs in get_all_reference_objects_for_many(contents)
+        }
+
+    def test_direct_references_are_deduplicated(self):
+        parents = [Parent.objects.create() for _ in range(2)]
+        children = [Child.objects.create(parent=parent) for parent in parents]
+        Child.objects.create(parent=Parent.objects.create())
+        many_child = ManyChild.objects.create()
+        many_child.parents.add(*parents)
+
+        references = self._evaluate(parents)
+
+        self.assertCountEqual(references[Child], children)
+        self.assertEqual(references[ManyChild], [many_child])
+
+    def test_references_through_plugins(self):
+        polls = PollFactory.create_batch(3)
+        page_contents = [PageContentFactory(language="en") for _ in range(2)]
+        placeholders = [
+            PlaceholderFactory(
+                content_type=ContentType.objects.get_for_model(page_content),
+                object_id=page_content.id,
+            )
+            for page_content in page_contents
+        ]
+        # The first page uses both polls of the batch
+        add_plugin(placeholders[0], "PollPlugin", "en", poll=polls[0], template=0)
+        add_plugin(placeholders[0], "PollPlugin", "en", poll=polls[1], template=0)
+        add_plugin(placeholders[1], "PollPlugin", "en", poll=polls[2], template=0)
+
+        references = self._evaluate(polls[:2])
+
+        self.assertEqual(references[page_contents[0].__class__], [page_contents[0]])
+
+    def test_number_of_queries_does_not_depend_on_number_of_contents(self):
+        parents = [Parent.objects.create() for _ in range(4)]
+        for parent in parents:
+            Child.objects.create(parent=parent)
+            GenericChild.objects.create(content_object=parent)
+        # Content types are cached by the first call
+        self._evaluate(parents[:1])
+
+        with CaptureQueriesContext(connection) as single:
+            self._evaluate(parents[:1])
+        with CaptureQueriesContext(connection) as many:
+            self._evaluate(parents)
+
+        self.assertEqual(len(single), len(many))
+
+
+class ReferenceOccurrencesTestCase(TestCase):
+    def test_occurrences(self):
+        poll = PollFactory()
+        page_content = PageContentFactory(language="en")
+        page_type = ContentType.objects.get_for_model(page_content)
+        plugins = [
+            add_plugin(
+                PlaceholderFactory(
+                    content_type=page_type, object_id=page_content.id, slot=slot
+                ),
+                "PollPlugin",
+                "en",
+                poll=poll,
+                template=0,
+            )
+            for slot in ("content", "sidebar")
+        ]
+        occurrences = {}
+
+        querysets = get_all_reference_objects(poll, occurrences=occurrences)
+
+        # The page is listed once, with both plugins as occurrences
+        self.assertEqual(len(querysets), 1)
+        self.assertQuerySetEqual(querysets[0], [page_content])
+        self.assertEqual(
+            occurrences[(page_type.pk, page_content.pk)],
+            [
+                ReferenceOccurrence(slot, plugin.pk, plugin.position, "en")
+                for slot, plugin in zip(("content", "sidebar"), plugins)
+            ],
+        )
+
+        with patch.object(
+            ContentType.objects, "db_manager", wraps=ContentType.objects.db_manager
+        ) as db_manager:
+            attach_reference_occurrences(querysets, occurrences, using="default")
+
+        db_manager.assert_called_once_with("default")
+        self.assertEqual(
+            querysets[0][0].reference_occurrences,
+            occurrences[(page_type.pk, page_content.pk)],
+        )
+
+
+class HasReferencesTestCase(TestCase):
+    def test_no_references(self):
+        Child.objects.create(parent=Parent.objects.create())
+
+        self.assertFalse(has_references(Parent.objects.create()))
+
+    def test_direct_references(self):
+        parent = Parent.objects.create()
+        Child.objects.create(parent=parent)
+
+        self.assertTrue(has_references(parent))
+
+    def test_references_through_plugins(self):
+        poll = PollFactory()
+        version = PageVersionFactory(content__language="en", state=DRAFT)
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(version.content),
+            object_id=version.content.id,
+        )
+        add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+
+        self.assertTrue(has_references(poll))
+        self.assertTrue(has_references(poll, state=DRAFT))
+        self.assertFalse(has_references(poll, state=PUBLISHED))
+
+    def test_single_query(self):
+        parent = Parent.objects.create()
+        GenericChild.objects.create(content_object=parent)
+        # Content types are cached by the first call
+        has_references(parent)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(has_references(parent))
+
+
+class GetUnreferencedObjectsTestCase(TestCase):
+    def test_reference_target_models(self):
+        target_models = get_reference_target_models()
+
+        self.assertIn(Parent, target_models)
+        self.assertIn(Poll, target_models)
+        self.assertEqual(len(target_models), len(set(target_models)))
+
+    def test_reference_target_models_skip_empty_entries(self):
+        extension = get_extension()
+
+        with patch.dict(extension.reference_models, {UnknownChild: {}}):
+            self.assertNotIn(UnknownChild, get_reference_target_models())
+
+    def test_unreferenced_objects(self):
+        parents = [Parent.objects.create() for _ in range(5)]
+        Child.objects.create(parent=parents[0])
+        ManyChild.objects.create().parents.add(parents[1])
+        GenericChild.objects.create(content_object=parents[2])
+        # Not a registered relation
+        UnknownChild.objects.create(parent=parents[3])
+
+        self.assertQuerySetEqual(get_unreferenced_objects(Parent), parents[3:])
+
+    def test_unreferenced_objects_of_state(self):
+        polls = PollFactory.create_batch(2)
+        version = PageVersionFactory(content__language="en", state=DRAFT)
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(version.content),
+            object_id=version.content.id,
+        )
+        add_plugin(placeholder, "PollPlugin", "en", poll=polls[0], template=0)
+
+        self.assertQuerySetEqual(get_unreferenced_objects(Poll), [polls[1]])
+        self.assertQuerySetEqual(
+            get_unreferenced_objects(Poll, state=PUBLISHED), polls
+        )
+
+
+class IterateReferenceEdgesTestCase(TestCase):
+    def test_edges(self):
+        parent = Parent.objects.create()
+        child = Child.objects.create(parent=parent)
+        generic_child = GenericChild.objects.create(content_object=parent)
+        poll = PollFactory()
+        page_content = PageContentFactory(language="en")
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(page_content),
+            object_id=page_content.id,
+        )
+        plugin = add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+        get_type = ContentType.objects.get_for_model
+
+        edges = list(iterate_reference_edges(chunk_size=1))
+
+        self.assertIn(
+            ReferenceEdge(
+                get_type(Child).pk, child.pk, get_type(Parent).pk, parent.pk,
+                "app_1.child.parent",
+            ),
+            edges,
+        )
+        self.assertIn(
+            ReferenceEdge(
+                get_type(GenericChild).pk, generic_child.pk, get_type(Parent).pk,
+                parent.pk, "app_1.genericchild.object_id",
+            ),
+            edges,
+        )
+        self.assertIn(
+            ReferenceEdge(
+                get_type(page_content).pk, page_content.pk, get_type(Poll).pk,
+                poll.pk, "{}.poll".format(plugin._meta.label_lower),
+            ),
+            edges,
+        )
+
+
+class GetOutgoingReferencesTestCase(TestCase):
+    def test_references_through_plugins(self):
+        page_content = PageContentFactory(language="en")
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(page_content),
+            object_id=page_content.id,
+        )
+        polls = PollFactory.create_batch(2)
+        PollFactory()
+        for poll in polls:
+            add_plugin(placeholder, "PollPlugin", "en", poll=poll, template=0)
+        add_plugin(placeholder, "PollPlugin", "de", poll=polls[0], template=0)
+
+        querysets = get_outgoing_references(page_content)
+        de_querysets = get_outgoing_references(page_content, language="de")
+
+        self.assertEqual(len(querysets), 1)
+        self.assertCountEqual(querysets[0], polls)
+        self.assertCountEqual(de_querysets[0], [polls[0]])
+
+    def test_references_through_fields(self):
+        poll_content = PollContentFactory()
+
+        querysets = get_outgoing_references(poll_content)
+
+        self.assertEqual(len(querysets), 1)
+        self.assertQuerySetEqual(querysets[0], [poll_content.poll])
+
+    def test_generic_references(self):
+        parent = Parent.objects.create()
+        generic_child = GenericChild.objects.create(content_object=parent)
+
+        querysets = get_outgoing_references(generic_child)
+
+        self.assertEqual(len(querysets), 1)
+        self.assertQuerySetEqual(querysets[0], [parent])
+
 
 class CombineQuerysetsTestCase(TestCase):
     def test_combine_querysets_of_same_models(self):
@@ -242,3 +729,216 @@ class VersionAttrTestCase(TestCase):
             mock.assert_called_once_with(content)
             func.assert_not_called()
             self.assertIsNone(result)
+
+
+class VersionAnnotationTestCase(TestCase):
+    def test_versioned(self):
+        version = PageVersionFactory()
+        content_model = version.content.__class__
+
+        queryset = content_model._base_manager.annotate(
+            state_label=version_annotation("state")(content_model),
+            author=version_annotation("created_by")(content_model),
+            modified=version_annotation("modified")(content_model),
+        ).get(pk=version.content.pk)
+
+        self.assertEqual(queryset.state_label, version.get_state_display())
+        self.assertEqual(queryset.author, version.created_by.username)
+        self.assertEqual(queryset.modified, version.modified)
+
+    def test_not_versioned(self):
+        self.assertIsNone(version_annotation("state")(Parent))
+
+
+class CompactRowsTestCase(TestCase):
+    def test_rows_from_values(self):
+        version = PageVersionFactory()
+        content = version.content
+        extra_columns = [
+            ExtraColumn(Mock(), "Status", version_annotation("state")),
+        ]
+
+        rows = get_compact_rows(
+            content.__class__._base_manager.filter(pk=content.pk), extra_columns
+        )
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertIsInstance(row, ReferenceRow)
+        self.assertEqual(row.pk, content.pk)
+        self.assertEqual(row.title, content.title)
+        self.assertEqual(row.language, content.language)
+        self.assertEqual(row.preview_url, get_object_preview_url(content))
+        self.assertEqual(
+            row.get_column_value(extra_columns[0]), version.get_state_display()
+        )
+        extra_columns[0].getter.assert_not_called()
+
+    @override_settings(CMS_ENDPOINT_LIVE_URL_QUERYSTRING_PARAM_ENABLED=True)
+    def test_rows_from_values_with_preview_url_querystring(self):
+        contents = PageContentFactory.create_batch(2, language="en")
+        model = contents[0].__class__
+
+        rows = get_compact_rows(
+            model._base_manager.filter(pk__in=[c.pk for c in contents]).order_by("pk"),
+            [],
+        )
+
+        self.assertEqual(
+            [row.preview_url for row in rows],
+            [get_object_preview_url(content) for content in contents],
+        )
+
+    def test_rows_from_instances(self):
+        parent = Parent.objects.create()
+        child = Child.objects.create(parent=parent)
+        extra_columns = [ExtraColumn(lambda obj: obj.parent_id, "Parent")]
+
+        rows = get_compact_rows(Child.objects.all(), extra_columns)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].pk, child.pk)
+        self.assertEqual(rows[0].title, str(child))
+        self.assertEqual(rows[0].get_column_value(extra_columns[0]), parent.pk)
+
+    def test_get_references_for_display_disabled(self):
+        querysets = [Child.objects.all()]
+
+        self.assertEqual(get_references_for_display(querysets, []), querysets)
+
+    @override_settings(DJANGOCMS_REFERENCES_COMPACT_ROWS=True)
+    def test_get_references_for_display_enabled(self):
+        child = Child.objects.create(parent=Parent.objects.create())
+
+        result = get_references_for_display([Child.objects.all()], [])
+
+        self.assertEqual([[row.pk for row in rows] for rows in result], [[child.pk]])
+
+
+class SortedReferencesTestCase(TestCase):
+    def setUp(self):
+        self.versions = [
+            PageVersionFactory(content__title=title) for title in ["b", "c", "a"]
+        ]
+        self.poll_content = PollContentFactory()
+        page_content_model = self.versions[0].content.__class__
+        self.querysets = [
+            page_content_model._base_manager.filter(
+                pk__in=[v.content.pk for v in self.versions]
+            ),
+            PollContent.objects.filter(pk=self.poll_content.pk),
+        ]
+
+    def _titles(self, values):
+        return [value["_ref_title"] for value in values]
+
+    def test_sort_by_title(self):
+        values = get_sorted_references(self.querysets, "title")
+
+        self.assertEqual(self._titles(values), ["", "a", "b", "c"])
+
+    def test_sort_by_title_descending(self):
+        values = get_sorted_references(self.querysets, "-title")
+
+        self.assertEqual(self._titles(values), ["c", "b", "a", ""])
+
+    def test_search(self):
+        values = get_sorted_references(self.querysets, "title", search="B")
+
+        self.assertEqual(self._titles(values), ["b"])
+
+    def test_unknown_sort(self):
+        with self.assertRaises(ValueError):
+            get_sorted_references(self.querysets, "foo")
+
+    def test_get_references_by_values(self):
+        values = get_sorted_references(self.querysets, "-title")[:2]
+
+        objects = get_references_by_values(self.querysets, values)
+
+        self.assertEqual(
+            objects, [self.versions[1].content, self.versions[0].content]
+        )
+
+
+class IterateReferencesTestCase(TestCase):
+    def test_prefetches_each_chunk(self):
+        versions = PageVersionFactory.create_batch(3)
+        model = versions[0].content.__class__
+        queryset = version_queryset_modifier(
+            model._base_manager.filter(pk__in=[v.content.pk for v in versions])
+        )
+
+        chunks = list(iterate_references([queryset], chunk_size=2))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        with self.assertNumQueries(0):
+            for chunk in chunks:
+                for obj in chunk:
+                    obj.versions.all()[0].created_by
+
+
+class PreviewUrlTestCase(TestCase):
+    def test_get_preview_url_reverses_once_per_model_and_language(self):
+        contents = PageContentFactory.create_batch(3, language="en")
+        preview_urls = {}
+
+        with patch.object(
+            helpers, "get_object_preview_url", wraps=get_object_preview_url
+        ) as mocked:
+            urls = [get_preview_url(content, preview_urls) for content in contents]
+
+        self.assertEqual(urls, [get_object_preview_url(content) for content in contents])
+        self.assertEqual(mocked.call_count, 1)
+
+    def test_get_preview_url_per_language(self):
+        en_content = PageContentFactory(language="en")
+        fr_content = PageContentFactory(language="fr")
+        preview_urls = {}
+
+        self.assertEqual(
+            get_preview_url(en_content, preview_urls), get_object_preview_url(en_content)
+        )
+        self.assertEqual(
+            get_preview_url(fr_content, preview_urls), get_object_preview_url(fr_content)
+        )
+        self.assertEqual(len(preview_urls), 2)
+
+    def test_get_preview_url_with_querystring(self):
+        contents = PageContentFactory.create_batch(2, language="en")
+        preview_urls = {}
+
+        with patch.object(
+            helpers,
+            "get_object_preview_url",
+            side_effect=lambda obj: "/preview/{}/?live-url=/{}/".format(obj.pk, obj.title),
+        ) as mocked:
+            urls = [get_preview_url(content, preview_urls) for content in contents]
+
+        self.assertEqual(
+            urls,
+            [
+                "/preview/{}/?live-url=/{}/".format(content.pk, content.title)
+                for content in contents
+            ],
+        )
+        self.assertEqual(mocked.call_count, 2)
+
+    def test_get_preview_url_not_toolbar_enabled(self):
+        parent = Parent.objects.create()
+
+        self.assertIsNone(get_preview_url(parent, {}))
+        self.assertEqual(
+            [row.preview_url for row in get_compact_rows(Parent.objects.all(), [])],
+            [None],
+        )
+
+    def test_attach_preview_urls(self):
+        content = PageContentFactory()
+        querysets = [content.__class__._base_manager.filter(pk=content.pk)]
+
+        attach_preview_urls(querysets)
+
+        self.assertEqual(
+            querysets[0][0].references_preview_url, get_object_preview_url(content)
+        )
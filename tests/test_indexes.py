@@ -0,0 +1,180 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from cms.models import CMSPlugin, Placeholder
+
+from djangocms_alias.models import AliasContent, AliasPlugin
+
+from djangocms_references.datastructures import IndexRequirement
+from djangocms_references.helpers import (
+    get_lookup,
+    get_versionable_for_content,
+)
+from djangocms_references.indexes import (
+    get_index_name,
+    get_index_requirements,
+    get_missing_indexes,
+    get_relation_requirements,
+    is_indexed,
+)
+from djangocms_references.test_utils.app_1.models import GenericChild
+from djangocms_references.test_utils.nested_references_app.models import (
+    DeeplyNestedPoll,
+    DeeplyNestedPollPlugin,
+    NestedPoll,
+)
+
+
+class GetRelationRequirementsTestCase(TestCase):
+    def test_nested_relation(self):
+        self.assertEqual(
+            list(
+                get_relation_requirements(
+                    DeeplyNestedPollPlugin, "deeply_nested_poll__nested_poll__poll"
+                )
+            ),
+            [
+                IndexRequirement(DeeplyNestedPollPlugin, ("deeply_nested_poll",)),
+                IndexRequirement(DeeplyNestedPoll, ("nested_poll",)),
+                IndexRequirement(NestedPoll, ("poll",)),
+            ],
+        )
+
+    def test_reverse_relation(self):
+        # Accessor name of alias contents differs between djangocms-alias versions
+        lookup = get_lookup("alias", get_versionable_for_content(AliasContent))
+
+        self.assertEqual(
+            list(get_relation_requirements(AliasPlugin, lookup)),
+            [
+                IndexRequirement(AliasPlugin, ("alias",)),
+                IndexRequirement(AliasContent, ("alias",)),
+            ],
+        )
+
+
+class GetIndexRequirementsTestCase(TestCase):
+    def test_requirements(self):
+        requirements = get_index_requirements()
+
+        self.assertIn(IndexRequirement(CMSPlugin, ("placeholder",)), requirements)
+        self.assertIn(
+            IndexRequirement(Placeholder, ("content_type", "object_id")), requirements
+        )
+        self.assertIn(IndexRequirement(AliasPlugin, ("alias",)), requirements)
+        # Alias is versioned, so lookups continue to its contents
+        self.assertIn(IndexRequirement(AliasContent, ("alias",)), requirements)
+        self.assertEqual(len(requirements), len(set(requirements)))
+
+    def test_generic_foreign_key_requirements(self):
+        requirements = get_index_requirements()
+
+        self.assertIn(
+            IndexRequirement(GenericChild, ("content_type", "object_id")), requirements
+        )
+
+
+class IsIndexedTestCase(TestCase):
+    def setUp(self):
+        self.requirement = IndexRequirement(Placeholder, ("content_type", "object_id"))
+
+    def _constraint(self, columns, index=True):
+        return {"columns": columns, "index": index, "unique": False, "primary_key": False}
+
+    def test_leading_columns_indexed(self):
+        constraints = {
+            "idx": self._constraint(["object_id", "content_type_id", "slot"]),
+        }
+        self.assertTrue(is_indexed(self.requirement, constraints))
+
+    def test_partially_indexed(self):
+        constraints = {
+            "idx": self._constraint(["content_type_id"]),
+            "idx2": self._constraint(["slot", "content_type_id", "object_id"]),
+        }
+        self.assertFalse(is_indexed(self.requirement, constraints))
+
+    def test_not_an_index(self):
+        constraints = {
+            "check": self._constraint(["content_type_id", "object_id"], index=False),
+        }
+        self.assertFalse(is_indexed(self.requirement, constraints))
+
+
+class GetMissingIndexesTestCase(TestCase):
+    def test_foreign_keys_are_indexed(self):
+        missing = get_missing_indexes()
+
+        self.assertNotIn(IndexRequirement(AliasPlugin, ("alias",)), missing)
+        self.assertNotIn(IndexRequirement(CMSPlugin, ("placeholder",)), missing)
+        self.assertNotIn(
+            IndexRequirement(GenericChild, ("content_type", "object_id")), missing
+        )
+
+    def test_index_name(self):
+        name = get_index_name(IndexRequirement(Placeholder, ("content_type", "object_id")))
+
+        self.assertLessEqual(len(name), 30)
+        self.assertEqual(
+            name, get_index_name(IndexRequirement(Placeholder, ("content_type", "object_id")))
+        )
+
+
+class CheckReferenceIndexesCommandTestCase(TestCase):
+    def test_all_indexed(self):
+        out = StringIO()
+        with patch(
+            "djangocms_references.management.commands.check_reference_indexes.get_missing_indexes",
+            return_value=[],
+        ):
+            call_command("check_reference_indexes", stdout=out)
+
+        self.assertIn("All columns used by reference lookups are indexed", out.getvalue())
+
+    def test_missing_indexes_reported(self):
+        out = StringIO()
+        with patch(
+            "djangocms_references.management.commands.check_reference_indexes.get_missing_indexes",
+            return_value=[IndexRequirement(Placeholder, ("content_type", "object_id"))],
+        ):
+            call_command("check_reference_indexes", stdout=out)
+
+        self.assertIn(
+            "Missing index on cms_placeholder (content_type_id, object_id)",
+            out.getvalue(),
+        )
+
+    def test_generate_migration(self):
+        requirement = IndexRequirement(Placeholder, ("content_type", "object_id"))
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory, patch(
+            "djangocms_references.management.commands.check_reference_indexes.get_missing_indexes",
+            return_value=[requirement],
+        ), patch(
+            "djangocms_references.management.commands.check_reference_indexes.MigrationWriter"
+        ) as writer:
+            path = os.path.join(directory, "0001_djangocms_references_indexes.py")
+            writer.return_value.path = path
+            call_command("check_reference_indexes", generate_migration="app_1", stdout=out)
+            with open(path, encoding="utf-8") as fh:
+                migration = fh.read()
+
+        migration_name = writer.call_args[0][0].name
+        self.assertEqual(migration_name, "0001_djangocms_references_indexes")
+        self.assertIn("Created migration {}".format(path), out.getvalue())
+        self.assertIn(
+            "('cms', 'placeholder', {!r}, ['content_type', 'object_id']),".format(
+                get_index_name(requirement)
+            ),
+            migration,
+        )
+        compile(migration, path, "exec")
+
+    def test_generate_migration_unknown_app(self):
+        with self.assertRaises(CommandError):
+            call_command("check_reference_indexes", generate_migration="unknown_app")
@@ -0,0 +1,86 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from djangocms_references.middleware import (
+    LAST_WRITE_SESSION_KEY,
+    ReadAfterWriteMiddleware,
+    has_recent_write,
+)
+
+
+class ReadAfterWriteMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReadAfterWriteMiddleware(lambda request: HttpResponse())
+        self.staff_user = User(username="staff", is_staff=True)
+
+    def test_write_is_recorded(self):
+        request = self.factory.post("/")
+        request.session = {}
+        request.user = self.staff_user
+
+        self.middleware(request)
+
+        self.assertIn(LAST_WRITE_SESSION_KEY, request.session)
+        self.assertTrue(has_recent_write(request))
+
+    def test_read_is_not_recorded(self):
+        request = self.factory.get("/")
+        request.session = {}
+        request.user = self.staff_user
+
+        self.middleware(request)
+
+        self.assertNotIn(LAST_WRITE_SESSION_KEY, request.session)
+        self.assertFalse(has_recent_write(request))
+
+    def test_write_of_anonymous_user_is_not_recorded(self):
+        request = self.factory.post("/")
+        request.session = {}
+        request.user = AnonymousUser()
+
+        self.middleware(request)
+
+        self.assertNotIn(LAST_WRITE_SESSION_KEY, request.session)
+
+    def test_write_of_non_staff_user_is_not_recorded(self):
+        request = self.factory.post("/")
+        request.session = {}
+        request.user = User(username="user")
+
+        self.middleware(request)
+
+        self.assertNotIn(LAST_WRITE_SESSION_KEY, request.session)
+
+    @override_settings(DJANGOCMS_REFERENCES_READ_AFTER_WRITE_TIMEOUT=5)
+    def test_recent_write_is_not_overwritten(self):
+        last_write = time.time() - 1
+        request = self.factory.post("/")
+        request.session = {LAST_WRITE_SESSION_KEY: last_write}
+        request.user = self.staff_user
+
+        self.middleware(request)
+
+        self.assertEqual(request.session[LAST_WRITE_SESSION_KEY], last_write)
+
+    @override_settings(DJANGOCMS_REFERENCES_READ_AFTER_WRITE_TIMEOUT=5)
+    def test_expired_write_is_overwritten(self):
+        last_write = time.time() - 10
+        request = self.factory.post("/")
+        request.session = {LAST_WRITE_SESSION_KEY: last_write}
+        request.user = self.staff_user
+
+        self.middleware(request)
+
+        self.assertGreater(request.session[LAST_WRITE_SESSION_KEY], last_write)
+
+    def test_request_without_session(self):
+        request = self.factory.post("/")
+        request.user = self.staff_user
+
+        self.middleware(request)
+
+        self.assertFalse(has_recent_write(request))
@@ -1,10 +1,12 @@
+from unittest.mock import patch
+
 from django.template import Context, Template
 from django.template.exceptions import TemplateSyntaxError
 from django.test import TestCase
 
 from cms.toolbar.utils import get_object_preview_url
 
-from djangocms_references.datastructures import ExtraColumn
+from djangocms_references.datastructures import ExtraColumn, ReferenceRow
 from djangocms_references.test_utils.factories import PageContentFactory
 
 
@@ -19,6 +21,15 @@ class ReferencesTemplateTagTest(TestCase):
         rendered_template = template_to_render.render(context)
         self.assertInHTML(expected_url, rendered_template)
 
+    def test_object_preview_url_precomputed(self):
+        obj = PageContentFactory()
+        obj.references_preview_url = "/precomputed/"
+        context = Context({"obj": obj})
+        template_to_render = Template(
+            "{% load djangocms_references_tags %}" "{% object_preview_url obj %}"
+        )
+        self.assertEqual(template_to_render.render(context), "/precomputed/")
+
     def test_object_preview_url_rendered_with_string_arg(self):
         obj = PageContentFactory()
         context = Context({"obj": obj})
@@ -69,3 +80,50 @@ class ReferencesTemplateTagTest(TestCase):
         )
         rendered_template = template_to_render.render(context)
         self.assertEqual(str(id(obj)), rendered_template)
+
+    def test_object_title(self):
+        obj = PageContentFactory(title="Home", language="en")
+        row = ReferenceRow(
+            model=obj.__class__, pk=obj.pk, title="Home", language="en"
+        )
+        template_to_render = Template(
+            "{% load djangocms_references_tags %}{% object_title obj %}"
+        )
+
+        # Compact rows of contents are displayed like their str()
+        self.assertEqual(template_to_render.render(Context({"obj": obj})), str(obj))
+        self.assertEqual(template_to_render.render(Context({"obj": row})), str(obj))
+
+    def test_object_title_of_model_object_uses_str(self):
+        obj = PageContentFactory(title="Home", language="en")
+        template_to_render = Template(
+            "{% load djangocms_references_tags %}{% object_title obj %}"
+        )
+
+        with patch.object(obj.__class__, "__str__", lambda self: "Custom title"):
+            html = template_to_render.render(Context({"obj": obj}))
+
+        self.assertEqual(html, "Custom title")
+
+    def test_tags_with_compact_row(self):
+        obj = PageContentFactory()
+        column = ExtraColumn(lambda o: "instance", "Foo")
+        row = ReferenceRow(
+            model=obj.__class__,
+            pk=obj.pk,
+            title="Row title",
+            preview_url="/preview/",
+            values=("compact",),
+            columns=[column],
+        )
+        context = Context({"obj": row, "column": column})
+        template_to_render = Template(
+            "{% load djangocms_references_tags %}"
+            "{{ obj }}|{% object_preview_url obj %}|{% object_model obj %}|"
+            "{% extra_column obj column %}"
+        )
+        rendered_template = template_to_render.render(context)
+        self.assertEqual(
+            "Row title|/preview/|{}|compact".format(obj._meta.model_name),
+            rendered_template,
+        )
@@ -10,6 +10,7 @@ from django.urls import include, path, re_path
 
 from cms.api import add_plugin
 from cms.test_utils.testcases import CMSTestCase
+from cms.toolbar.utils import get_object_preview_url
 
 from djangocms_versioning.constants import (
     ARCHIVED,
@@ -27,6 +28,7 @@ from djangocms_references.test_utils.factories import (
     PollContentFactory,
     PollFactory,
 )
+from djangocms_references.test_utils.polls.models import PollPlugin
 
 
 urlpatterns = [
@@ -165,6 +167,335 @@ class ReferencesViewTestCases(CMSTestCase):
         self.assertEqual(response.context["querysets"][0].count(), 1)
         self.assertIn(page_content, response.context["querysets"][0])
 
+    def test_view_sorted_and_paginated(self):
+        poll = PollFactory()
+        contents = []
+        for title in ["b", "c", "a"]:
+            version = PageVersionFactory(content__title=title, content__language="en")
+            placeholder = PlaceholderFactory(
+                content_type=ContentType.objects.get_for_model(version.content),
+                object_id=version.content.id,
+            )
+            add_plugin(placeholder, "PollPlugin", "en", poll=poll)
+            contents.append(version.content)
+        url = get_view_url(
+            content_type_id=ContentType.objects.get_for_model(poll).pk,
+            object_id=poll.id,
+        )
+
+        with self.login_user_context(self.superuser), override_settings(
+            DJANGOCMS_REFERENCES_PAGE_SIZE=2
+        ):
+            response = self.client.get(url + "?sort=-title")
+            second_page = self.client.get(url + "?sort=-title&page=2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["querysets"], [[contents[1], contents[0]]])
+        self.assertEqual(response.context["paginator"].count, 3)
+        self.assertEqual(second_page.context["querysets"], [[contents[2]]])
+
+    def test_view_search(self):
+        poll = PollFactory()
+        contents = []
+        for title in ["apple", "banana"]:
+            version = PageVersionFactory(content__title=title, content__language="en")
+            placeholder = PlaceholderFactory(
+                content_type=ContentType.objects.get_for_model(version.content),
+                object_id=version.content.id,
+            )
+            add_plugin(placeholder, "PollPlugin", "en", poll=poll)
+            contents.append(version.content)
+        url = get_view_url(
+            content_type_id=ContentType.objects.get_for_model(poll).pk,
+            object_id=poll.id,
+        )
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url + "?q=nan")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["querysets"], [[contents[1]]])
+
+    def _create_poll_references(self):
+        poll = PollFactory()
+        poll_content = PollContentFactory(poll=poll, language="en")
+        version = PageVersionFactory(content__language="en")
+        placeholder = PlaceholderFactory(
+            content_type=ContentType.objects.get_for_model(version.content),
+            object_id=version.content.id,
+        )
+        add_plugin(placeholder, "PollPlugin", "en", poll=poll)
+        url = get_view_url(
+            content_type_id=ContentType.objects.get_for_model(poll).pk,
+            object_id=poll.id,
+        )
+        return url, poll_content, version.content
+
+    @override_settings(DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD=1)
+    def test_view_summary_above_threshold(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("querysets", response.context)
+        summary = response.context["summary"]
+        self.assertEqual(summary.total, 2)
+        self.assertCountEqual(
+            summary.content_types,
+            [
+                (ContentType.objects.get_for_model(poll_content), 1),
+                (ContentType.objects.get_for_model(page_content), 1),
+            ],
+        )
+        self.assertEqual(summary.languages, [("en", 2)])
+        self.assertEqual(summary.states, [(DRAFT, "Draft", 1)])
+        self.assertContains(response, "?full=1")
+
+    @override_settings(DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD=1)
+    def test_view_summary_full_list(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url + "?full=1")
+
+        self.assertIsNone(response.context["summary"])
+        self.assertEqual(len(response.context["querysets"]), 2)
+
+    @override_settings(DJANGOCMS_REFERENCES_SUMMARY_THRESHOLD=1)
+    def test_view_summary_content_type_drill_down(self):
+        url, poll_content, page_content = self._create_poll_references()
+        content_type = ContentType.objects.get_for_model(page_content)
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(
+                url + "?content_type={}&full=1".format(content_type.pk)
+            )
+
+        self.assertEqual(len(response.context["querysets"]), 1)
+        self.assertQuerySetEqual(response.context["querysets"][0], [page_content])
+
+    def test_view_static_placeholder_without_preview_url(self):
+        from cms.models import StaticPlaceholder
+
+        url, poll_content, page_content = self._create_poll_references()
+        static_placeholder = StaticPlaceholder.objects.create(
+            name="footer",
+            code="footer",
+            draft=PlaceholderFactory(slot="footer"),
+            public=PlaceholderFactory(slot="footer"),
+        )
+        add_plugin(
+            static_placeholder.draft, "PollPlugin", "en", poll=poll_content.poll
+        )
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<td>{}</td>".format(static_placeholder))
+        # The preview endpoint can't render static placeholders
+        self.assertNotContains(response, get_object_preview_url(static_placeholder))
+        self.assertContains(response, get_object_preview_url(page_content))
+
+    @override_settings(
+        DJANGOCMS_REFERENCES_STREAMING=True,
+        DJANGOCMS_REFERENCES_STREAMING_CHUNK_SIZE=1,
+    )
+    def test_view_streaming(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("<td>{}</td>".format(poll_content), content)
+        self.assertIn("<td>{}</td>".format(page_content), content)
+        self.assertNotIn("djangocms-references-rows", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    @override_settings(DJANGOCMS_REFERENCES_STREAMING=True)
+    def test_view_streaming_without_references(self):
+        with self.login_user_context(self.superuser):
+            response = self.client.get(self.view_url)
+
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("There are no related objects", content)
+
+    @override_settings(DJANGOCMS_REFERENCES_PROGRESSIVE_LOADING=True)
+    def test_view_progressive_loading_lists_groups(self):
+        url, poll_content, page_content = self._create_poll_references()
+        page_content_type = ContentType.objects.get_for_model(page_content)
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url + "?state=draft")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("querysets", response.context)
+        self.assertCountEqual(
+            [content_type for content_type, group_url in response.context["groups"]],
+            [ContentType.objects.get_for_model(poll_content), page_content_type],
+        )
+        self.assertContains(
+            response,
+            'data-url="{}group/{}/?state=draft"'.format(url, page_content_type.pk),
+        )
+        # Displayed by actions.js when loading rows of a group fails
+        self.assertContains(
+            response, 'data-error="References could not be loaded, please try again."'
+        )
+
+    def test_group_view(self):
+        url, poll_content, page_content = self._create_poll_references()
+        group_url = "{}group/{}/".format(
+            url, ContentType.objects.get_for_model(page_content).pk
+        )
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(group_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["querysets"]), 1)
+        self.assertQuerySetEqual(response.context["querysets"][0], [page_content])
+        self.assertContains(response, "<td>{}</td>".format(page_content), html=True)
+
+    def test_group_view_requires_permission(self):
+        url, poll_content, page_content = self._create_poll_references()
+        group_url = "{}group/{}/".format(
+            url, ContentType.objects.get_for_model(page_content).pk
+        )
+        user = self.get_staff_user_with_no_permissions()
+
+        with self.login_user_context(user):
+            response = self.client.get(group_url)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_json_view(self):
+        url, poll_content, page_content = self._create_poll_references()
+        page_content_type = ContentType.objects.get_for_model(page_content)
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url + "json/?sort=-content_type")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = response.json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(data["page"], 1)
+        self.assertCountEqual(
+            [(item["model"], item["count"]) for item in data["content_types"]],
+            [("polls.pollcontent", 1), ("cms.pagecontent", 1)],
+        )
+        self.assertEqual(
+            [(row["model"], row["id"]) for row in data["results"]],
+            [("polls.pollcontent", poll_content.pk), ("cms.pagecontent", page_content.pk)],
+        )
+        self.assertEqual(data["results"][1]["content_type"], page_content_type.pk)
+        self.assertEqual(data["results"][1]["title"], page_content.title)
+        self.assertEqual(data["results"][1]["language"], page_content.language)
+
+    def test_json_view_not_modified(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url + "json/")
+            not_modified = self.client.get(
+                url + "json/", HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_json_view_requires_permission(self):
+        user = self.get_staff_user_with_no_permissions()
+
+        with self.login_user_context(user):
+            response = self.client.get(self.view_url + "json/")
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGOCMS_REFERENCES_WATERMARK=True)
+    def test_view_watermark_not_modified(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url)
+            with patch(
+                "djangocms_references.views.get_all_reference_objects"
+            ) as get_all_reference_objects:
+                not_modified = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(not_modified.status_code, 304)
+        get_all_reference_objects.assert_not_called()
+
+    @override_settings(DJANGOCMS_REFERENCES_WATERMARK=True)
+    def test_view_watermark_changes_on_save(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url)
+            PollContentFactory(poll=poll_content.poll, language="en")
+            modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            other_url = self.client.get(
+                url + "?state=draft", HTTP_IF_NONE_MATCH=modified["ETag"]
+            )
+
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified["ETag"], response["ETag"])
+        self.assertEqual(other_url.status_code, 200)
+
+    @override_settings(DJANGOCMS_REFERENCES_WATERMARK=True)
+    def test_view_watermark_read_once(self):
+        url, poll_content, page_content = self._create_poll_references()
+
+        with self.login_user_context(self.superuser), patch(
+            "djangocms_references.views.get_watermark", side_effect=["1", "2"]
+        ) as get_watermark:
+            response = self.client.get(url)
+
+        # The ETag is built from the watermark read before the response
+        get_watermark.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+
+    def test_outgoing_view(self):
+        url, poll_content, page_content = self._create_poll_references()
+        outgoing_url = reverse(
+            "djangocms_references:references-outgoing",
+            kwargs={
+                "content_type_id": ContentType.objects.get_for_model(page_content).pk,
+                "object_id": page_content.pk,
+            },
+        )
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(outgoing_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["querysets"]), 1)
+        self.assertQuerySetEqual(response.context["querysets"][0], [poll_content.poll])
+
+    def test_view_occurrences(self):
+        url, poll_content, page_content = self._create_poll_references()
+        plugin = PollPlugin.objects.get()
+
+        with self.login_user_context(self.superuser):
+            response = self.client.get(url, {"occurrences": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["show_occurrences"])
+        self.assertContains(
+            response,
+            "{}: plugin {}, position {}".format(
+                plugin.placeholder.slot, plugin.pk, plugin.position
+            ),
+        )
+
     def test_extra_columns(self):
         extra_column = ExtraColumn(lambda o: "{} test".format(o), "Test column")
 
@@ -425,3 +756,25 @@ class ReferencesViewVersionFilterTestCases(CMSTestCase):
             transform=lambda x: x.pk,
             ordered=False,
         )
+
+    def test_view_version_state_counts(self):
+        """
+        Each state filter shows the number of latest versions in that state
+        """
+        self._create_data_set_for_latest_versions(
+            version_state_1=PUBLISHED,
+            version_state_2=DRAFT,
+        )
+
+        with self.login_user_context(self.get_superuser()):
+            response = self.client.get(self.admin_endpoint + f"?state={ARCHIVED}")
+
+        self.assertEqual(response.status_code, 200)
+        counts = {
+            key: count for key, label, count in response.context["version_state_counts"]
+        }
+        self.assertEqual(counts[DRAFT], 2)
+        self.assertEqual(counts[PUBLISHED], 2)
+        self.assertEqual(counts[ARCHIVED], 0)
+        self.assertEqual(counts[UNPUBLISHED], 0)
+        self.assertQuerySetEqual(response.context["querysets"][0], [])